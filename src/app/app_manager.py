@@ -2,12 +2,14 @@ import cv2
 import signal
 import threading
 import queue
-from detection.detector_thread import FaceDetectorThread
+from detection.detector_thread import FaceDetectorThread, YOLODetectorThread
+from utils.frame_pool import frame_pool
 
 class AppManager:
     def __init__(self):
         self.running = True
         self.cap = None
+        self.frame_reader = None
         self.setup_signal_handlers()
         
         # Feature toggle flags
@@ -15,10 +17,13 @@ class AppManager:
         self.object_detection_enabled = True
         
         # Threading components
+        self.stop_event = threading.Event()
         self.face_queue = queue.Queue(maxsize=1)
         self.face_result_queue = queue.Queue(maxsize=1)
         self.face_thread = None
-        self.face_thread_running = False
+        self.yolo_queue = queue.Queue(maxsize=1)
+        self.yolo_result_queue = queue.Queue(maxsize=1)
+        self.yolo_thread = None
 
     def setup_signal_handlers(self):
         """Set up handlers for graceful shutdown"""
@@ -32,24 +37,29 @@ class AppManager:
 
     def cleanup(self):
         """Clean up resources"""
-        # Stop face detection thread
-        self.face_thread_running = False
-        if self.face_thread and self.face_thread.is_alive():
-            self.face_thread.join(timeout=1.0)
+        # Stop detection threads
+        self.stop_event.set()
+        for thread in (self.face_thread, self.yolo_thread):
+            if thread and thread.is_alive():
+                thread.join(timeout=1.0)
+            
+        # Stop capturing before the device is released
+        if self.frame_reader:
+            self.frame_reader.stop()
             
         if self.cap and self.cap.isOpened():
             self.cap.release()
         cv2.destroyAllWindows()
+        print(f"Frame buffers allocated: {frame_pool.allocations} for {frame_pool.acquired} pooled frames")
         print('Cleanup complete')
         
     def start_face_thread(self, face_model):
         """Start the face detection thread"""
-        self.face_thread_running = True
         detector = FaceDetectorThread(
             face_model,
             self.face_queue, 
             self.face_result_queue, 
-            self.face_thread_running
+            self.stop_event
         )
         self.face_thread = threading.Thread(
             target=detector.run,
@@ -57,6 +67,20 @@ class AppManager:
         )
         self.face_thread.start()
         
+    def start_yolo_thread(self, yolo_model):
+        """Start the YOLO object detection thread"""
+        detector = YOLODetectorThread(
+            yolo_model,
+            self.yolo_queue,
+            self.yolo_result_queue,
+            self.stop_event
+        )
+        self.yolo_thread = threading.Thread(
+            target=detector.run,
+            daemon=True
+        )
+        self.yolo_thread.start()
+        
     def toggle_face_detection(self):
         """Toggle face detection on/off"""
         self.face_detection_enabled = not self.face_detection_enabled
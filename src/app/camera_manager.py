@@ -1,5 +1,6 @@
 import cv2
 from config import YOLOConfig
+from app.frame_reader import FrameReader
 
 class CameraManager:
     def __init__(self, app_manager):
@@ -9,8 +10,16 @@ class CameraManager:
         self.original_height = 0
         self.needs_resize = False
         
+        # Sequence number and capture time of the last frame returned by get_frame
+        self.frame_sequence = 0
+        self.frame_timestamp = 0
+        
     def setup_camera(self, camera_id):
         """Initialize camera with error handling and resolution management"""
+        # Stop the previous capture thread before releasing its device
+        if self.app_manager.frame_reader:
+            self.app_manager.frame_reader.stop()
+            self.app_manager.frame_reader = None
         if self.app_manager.cap:
             self.app_manager.cap.release()
         
@@ -31,9 +40,21 @@ class CameraManager:
         self.needs_resize = (self.original_width > YOLOConfig.MAX_CAMERA_WIDTH or 
                             self.original_height > YOLOConfig.MAX_CAMERA_HEIGHT)
         
+        target_size = None
         if self.needs_resize:
             print(f"Input will be resized to max {YOLOConfig.MAX_CAMERA_WIDTH}x{YOLOConfig.MAX_CAMERA_HEIGHT}")
             
+            # Calculate new dimensions while preserving aspect ratio
+            scale = min(YOLOConfig.MAX_CAMERA_WIDTH / self.original_width,
+                        YOLOConfig.MAX_CAMERA_HEIGHT / self.original_height)
+            target_size = (int(self.original_width * scale), int(self.original_height * scale))
+        
+        # Drain the device on a background thread so reads never wait on I/O
+        self.frame_sequence = 0
+        self.app_manager.frame_reader = FrameReader(self.app_manager.cap, target_size,
+                                                    keep_full=YOLOConfig.TILED_DETECTION)
+        self.app_manager.frame_reader.start()
+            
         return self.app_manager.cap
     
     def switch_camera(self):
@@ -41,25 +62,30 @@ class CameraManager:
         self.current_camera = 1 if self.current_camera == 0 else 0
         return self.setup_camera(self.current_camera)
         
+    def wait_for_frame(self):
+        """Block (without spinning) until a frame newer than the last returned one is captured"""
+        reader = self.app_manager.frame_reader
+        return bool(reader) and reader.wait(self.frame_sequence)
+        
     def get_frame(self):
-        """Get a frame from the camera with optional resizing"""
-        if not self.app_manager.cap:
+        """Get the newest captured frame, waiting for one newer than the last returned
+        
+        The frame is a PooledFrame shared with other stages; retain() it if it
+        must outlive a few more captures, and never draw on it.
+        """
+        reader = self.app_manager.frame_reader
+        if not reader:
             return False, None
             
-        ret, frame = self.app_manager.cap.read()
+        ret, frame, sequence, timestamp = reader.read(self.frame_sequence)
         if not ret:
             return False, None
-            
-        # Resize frame if needed (preserve aspect ratio)
-        if self.needs_resize:
-            # Calculate new dimensions while preserving aspect ratio
-            scale = min(YOLOConfig.MAX_CAMERA_WIDTH / self.original_width,
-                        YOLOConfig.MAX_CAMERA_HEIGHT / self.original_height)
-            new_width = int(self.original_width * scale)
-            new_height = int(self.original_height * scale)
-            
-            # Resize frame
-            frame = cv2.resize(frame, (new_width, new_height), 
-                              interpolation=cv2.INTER_AREA)  # INTER_AREA is best for downsampling
-            
-        return True, frame
\ No newline at end of file
+        
+        self.frame_sequence = sequence
+        self.frame_timestamp = timestamp
+        return True, frame
+    
+    def get_full_frame(self):
+        """Full-resolution capture (a PooledFrame) of the frame last returned by get_frame, if still available"""
+        reader = self.app_manager.frame_reader
+        return reader.full_frame(self.frame_sequence) if reader else None
\ No newline at end of file
@@ -1,45 +1,61 @@
-import os
 import time
 import queue
-import cv2
-import numpy as np
+from detection.detector_thread import put_latest
+from detection.tracker import Tracker
 from utils.result_processor import ResultProcessor
+from detection.detections import Detections
+from utils.roi import pad_box, merge_boxes
+from utils.metrics import metrics
+from utils.frame_pool import release_item
+from app.detection_scheduler import DetectionScheduler
+from detection.motion_gate import MotionGate
 from config import YOLOConfig
 
 class DetectionManager:
-    def __init__(self, app_manager, yolo_model, face_model):
+    def __init__(self, app_manager, yolo_model, face_model, queues=None):
         self.app_manager = app_manager
         self.yolo_model = yolo_model
         self.face_model = face_model
         
+        # Detection worker queues; each camera stream can bring its own set
+        self.queues = queues or app_manager
+        
         self.last_yolo_detection_time = 0
+        self.last_yolo_submission_time = None  # Timestamp of the frame last handed to the YOLO worker
+        self.last_yolo_result_time = 0  # Timestamp of the frame behind last_yolo_results
         self.last_face_submission_time = 0
-        self.face_interval = 2.0  # Submit frames for face detection every 2 seconds
+        self.face_submission_refused = False  # The due face submission already counted as queue_full
+        
+        # Detection and face intervals adapt to inference latency and scene activity
+        self.scheduler = DetectionScheduler(yolo_model)
+        
+        # Inference is skipped on frames where nothing changed since the last pass
+        self.motion_gate = MotionGate() if YOLOConfig.MOTION_GATE_ENABLED else None
         
         # Store last detection results
-        self.last_yolo_results = ([], [], [])
-        self.last_face_results = ([], [], [])
+        self.last_yolo_results = Detections.empty()
+        self.yolo_tracker = Tracker() if YOLOConfig.TRACKING_ENABLED else None
+        self.last_face_results = Detections.empty()
         
         # Load classes
         self.yolo_classes = []
         self.face_classes = []
         self.classes = []
+        self.classes_version = 0
         self.load_classes()
         
         self.result_processor = ResultProcessor()
     
-    def load_classes(self, faces_dir="training_data/faces"):
+    def load_classes(self):
         """Load YOLO and face recognition classes"""
         
-        # Load YOLO classes
-        with open(YOLOConfig.CLASSES_FILE, 'r') as f:
-            self.yolo_classes = f.read().strip().split('\n')
+        # YOLO classes come from the model's compiled class filter
+        class_filter = self.yolo_model.class_filter
+        self.yolo_classes = class_filter.names
+        self.classes_version = class_filter.version
         
-        # Load face classes
-        self.face_classes = []
-        if os.path.exists(faces_dir):
-            self.face_classes = [os.path.splitext(f)[0] for f in os.listdir(faces_dir) 
-                               if f.lower().endswith(('.jpg', '.jpeg', '.png'))]
+        # Face classes follow the model's gallery order so face class IDs line up
+        self.face_classes = list(self.face_model.known_face_names)
         
         # Combine classes
         self.classes = self.yolo_classes + self.face_classes
@@ -49,61 +65,113 @@ class DetectionManager:
         
         return self.classes
     
-    def process_frame(self, frame, current_time):
-        """Process a frame with YOLO and face detection at optimal resolutions"""
-        
-        # YOLO detection at normal interval (if enabled)
-        if self.app_manager.object_detection_enabled and current_time - self.last_yolo_detection_time >= YOLOConfig.DETECTION_INTERVAL:
-            # Resize frame for YOLO processing (if different from YOLO input size)
-            h, w = frame.shape[:2]
-            if w != YOLOConfig.YOLO_PROCESS_WIDTH or h != YOLOConfig.YOLO_PROCESS_HEIGHT:
-                yolo_frame = cv2.resize(frame, (YOLOConfig.YOLO_PROCESS_WIDTH, YOLOConfig.YOLO_PROCESS_HEIGHT))
-                original_dims = (w, h)  # Store original dimensions for scaling results
-            else:
+    def process_frame(self, frame, current_time, full_frame=None):
+        """Process a frame with YOLO and face detection at optimal resolutions
+        
+        frame is a PooledFrame from the capture reader. The detection workers
+        retain() it rather than copying it, so the capture buffer is shared
+        read-only between stages. full_frame is the undownscaled capture of the
+        same frame; in tiled mode YOLO runs on it and the boxes are scaled back
+        to frame coordinates.
+        """
+        
+        # Rebuild the combined class list if the model reloaded its classes file
+        if self.yolo_model.class_filter.version != self.classes_version:
+            self.load_classes()
+        
+        # Submit frames for YOLO detection at normal interval (if enabled).
+        # The worker only ever holds the newest frame, so a slow forward pass
+        # never backs up the render loop.
+        if self.app_manager.object_detection_enabled and current_time - self.last_yolo_detection_time >= self.scheduler.yolo.interval:
+            run, _ = self.check_motion('yolo', frame.array, current_time)
+            if run:
                 yolo_frame = frame
-                original_dims = None
-                
-            # Run YOLO detection
-            yolo_results = self.yolo_model.detect_objects(yolo_frame)
-            
-            # Scale results back to original frame dimensions if needed
-            if original_dims:
-                boxes, class_ids, confidences = yolo_results
-                scaled_boxes = []
-                for box in boxes:
-                    x, y, w, h = box
-                    x_scale = original_dims[0] / YOLOConfig.YOLO_PROCESS_WIDTH
-                    y_scale = original_dims[1] / YOLOConfig.YOLO_PROCESS_HEIGHT
-                    scaled_box = [
-                        int(x * x_scale),
-                        int(y * y_scale),
-                        int(w * x_scale),
-                        int(h * y_scale)
-                    ]
-                    scaled_boxes.append(scaled_box)
-                self.last_yolo_results = (scaled_boxes, class_ids, confidences)
-            else:
-                self.last_yolo_results = yolo_results
-                
+                # (x, y) factor from the submitted frame to the display frame, travelling with
+                # the frame so a result is scaled for the frame it came from
+                result_scale = None
+                if (YOLOConfig.TILED_DETECTION and full_frame is not None and
+                        full_frame.array.shape != frame.array.shape):
+                    yolo_frame = full_frame
+                    result_scale = (frame.array.shape[1] / full_frame.array.shape[1],
+                                    frame.array.shape[0] / full_frame.array.shape[0])
+                # The worker takes its own reference to the capture buffer instead of a copy;
+                # a frame it never got to is released straight away
+                put_latest(self.queues.yolo_queue, (current_time, yolo_frame.retain(), result_scale),
+                           on_discard=release_item)
+                self.scheduler.yolo.submitted()
+                self.last_yolo_submission_time = current_time
+            elif self.yolo_tracker:
+                # Nothing moved, so the tracked boxes are still where they were
+                self.yolo_tracker.hold(current_time)
             self.last_yolo_detection_time = current_time
         
         elif not self.app_manager.object_detection_enabled:
             # Clear YOLO results when disabled
-            self.last_yolo_results = ([], [], [])
+            self.last_yolo_results = Detections.empty()
+            if self.yolo_tracker:
+                self.yolo_tracker.clear()
+            if self.motion_gate:
+                self.motion_gate.reset('yolo')  # Detect again as soon as it is re-enabled
+        
+        # Check for YOLO detection results, ignoring any older than what we show
+        try:
+            result_time, yolo_results, result_scale = self.queues.yolo_result_queue.get_nowait()
+            # Latency is measured for the frame last submitted; results for frames it replaced don't count
+            if result_time == self.last_yolo_submission_time:
+                self.scheduler.yolo.completed()
+            if self.app_manager.object_detection_enabled and result_time >= self.last_yolo_result_time:
+                if result_scale:
+                    yolo_results = yolo_results.scale(*result_scale)
+                self.last_yolo_results = yolo_results
+                self.last_yolo_result_time = result_time
+                if self.yolo_tracker:
+                    self.yolo_tracker.update(yolo_results.boxes, yolo_results.class_ids,
+                                             yolo_results.confidences, result_time)
+                tracks = self.yolo_tracker.tracks if self.yolo_tracker else []
+                self.scheduler.update(tracks, len(yolo_results), result_time)
+                if self.yolo_tracker:
+                    # Track lifetimes follow the adaptive cadence, not the configured interval
+                    self.yolo_tracker.set_interval(self.scheduler.yolo.interval)
+        except queue.Empty:
+            pass  # No results available yet
+        
+        # Carry tracked boxes forward to this frame between detection passes
+        if self.yolo_tracker and self.app_manager.object_detection_enabled:
+            self.last_yolo_results = self.yolo_tracker.predict(current_time)
         
         # Submit frames for face detection at specified interval (if enabled)
-        if self.app_manager.face_detection_enabled and current_time - self.last_face_submission_time >= self.face_interval:
-            if self.app_manager.face_queue.empty():  # Only if queue is empty
-                self.app_manager.face_queue.put(frame.copy())
+        if self.app_manager.face_detection_enabled and current_time - self.last_face_submission_time >= self.scheduler.face.interval:
+            rois = self.face_rois(frame.array)
+            if rois is not None and not rois:
+                # Nobody in view, so there are no faces to look for
+                self.last_face_results = Detections.empty()
+                self.last_face_submission_time = current_time
+            elif self.queues.face_queue.empty():  # Only if queue is empty
+                run, motion_rois = self.check_motion('face', frame.array, current_time)
+                if run:
+                    if rois is None and motion_rois:
+                        rois = motion_rois
+                    self.queues.face_queue.put((current_time, frame.retain(), rois))
+                    self.scheduler.face.submitted()
                 self.last_face_submission_time = current_time
+                self.face_submission_refused = False
+            elif not self.face_submission_refused:
+                # The face worker is still busy with an earlier frame. The submission
+                # stays due and is retried each frame, but is only counted once.
+                metrics.inc('queue_full', queue='face_queue')
+                self.face_submission_refused = True
         elif not self.app_manager.face_detection_enabled:
             # Clear face results when disabled
-            self.last_face_results = ([], [], [])
+            self.last_face_results = Detections.empty()
+            if self.motion_gate:
+                self.motion_gate.reset('face')
         
         # Check for face detection results
         try:
-            if not self.app_manager.face_result_queue.empty():
-                self.last_face_results = self.app_manager.face_result_queue.get_nowait()
+            if not self.queues.face_result_queue.empty():
+                self.last_face_results = self.queues.face_result_queue.get_nowait()
+                self.scheduler.face.completed()
+                self.scheduler.update_face()
         except queue.Empty:
             pass  # No results available yet
         
@@ -113,4 +181,46 @@ class DetectionManager:
             self.last_face_results,
             self.yolo_classes,
             self.classes
-        )
\ No newline at end of file
+        )
+    
+    def detect(self, frame, detect_objects=True, detect_faces=True, yolo_results=None):
+        """Run YOLO and face detection synchronously on one frame (for offline processing)
+        
+        yolo_results can be passed in when YOLO already ran elsewhere, e.g. in a batch.
+        """
+        if self.yolo_model.class_filter.version != self.classes_version:
+            self.load_classes()
+        
+        if yolo_results is None:
+            yolo_results = self.yolo_model.detect(frame) if detect_objects else Detections.empty()
+        face_results = self.face_model.detect_objects(frame) if detect_faces else Detections.empty()
+        return self.result_processor.combine_results(
+            yolo_results,
+            face_results,
+            self.yolo_classes,
+            self.classes
+        )
+    
+    def check_motion(self, detector, frame, current_time):
+        """Ask the motion gate whether detector should run; returns (run, changed_rois)"""
+        if not self.motion_gate:
+            return True, None
+        return self.motion_gate.check(detector, frame, current_time)
+    
+    def face_rois(self, frame):
+        """Padded, merged person boxes to search for faces, or None to search the whole frame"""
+        if not YOLOConfig.FACE_PERSON_ROI or not self.app_manager.object_detection_enabled:
+            return None
+        
+        # Person boxes only exist if the person class is enabled in the classes file
+        class_filter = self.yolo_model.class_filter
+        if not any(name.strip() == 'person' and enabled
+                   for name, enabled in zip(class_filter.names, class_filter.enabled_mask)):
+            return None
+        person_id = [name.strip() for name in class_filter.names].index('person')
+        
+        frame_height, frame_width = frame.shape[:2]
+        people = self.last_yolo_results[self.last_yolo_results.class_ids == person_id]
+        rois = [pad_box(box, YOLOConfig.FACE_ROI_PADDING, frame_width, frame_height)
+                for box in people.boxes.tolist()]
+        return merge_boxes([roi for roi in rois if roi is not None])
@@ -0,0 +1,161 @@
+import time
+import numpy as np
+from config import YOLOConfig
+
+class DetectorCadence:
+    """Submission interval for one detector, kept within bounds and a CPU share
+
+    A detector taking L seconds per pass at interval I keeps roughly L / I of a
+    core busy, so the interval never drops below L / cpu_budget. Within that
+    floor, busy scenes pull the interval towards min_interval and static ones
+    let it relax towards max_interval.
+    """
+
+    def __init__(self, interval, min_interval, max_interval, cpu_budget,
+                 smoothing=YOLOConfig.ADAPTIVE_SMOOTHING):
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.cpu_budget = cpu_budget
+        self.smoothing = smoothing
+
+        self.latency = None  # Smoothed seconds from submission to result
+        self._submitted_at = None
+
+    def submitted(self):
+        """Note that a frame was handed to the detector"""
+        self._submitted_at = time.perf_counter()
+
+    def completed(self):
+        """Note that the detector returned a result for the last submission"""
+        if self._submitted_at is None:
+            return
+        latency = time.perf_counter() - self._submitted_at
+        self._submitted_at = None
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency = self.smoothing * self.latency + (1 - self.smoothing) * latency
+
+    def budget_interval(self):
+        """Shortest interval that keeps the detector within its CPU share"""
+        if self.latency is None:
+            return self.min_interval
+        return self.latency / self.cpu_budget
+
+    def adapt(self, activity):
+        """Move the interval towards what the scene activity asks for, within the CPU budget"""
+        wanted = self.max_interval - activity * (self.max_interval - self.min_interval)
+        target = min(max(wanted, self.budget_interval(), self.min_interval), self.max_interval)
+
+        # React at once when the scene gets busier, relax gradually when it calms down
+        if target < self.interval:
+            self.interval = target
+        else:
+            self.interval = self.smoothing * self.interval + (1 - self.smoothing) * target
+        return self.interval
+
+    def cpu_share(self):
+        """Estimated fraction of a core this detector is using"""
+        if self.latency is None or self.interval <= 0:
+            return 0.0
+        return min(self.latency / self.interval, 1.0)
+
+class DetectionScheduler:
+    """Tunes YOLO and face detection cadence from inference latency and scene activity
+
+    Activity is measured from the YOLO tracker between detection passes: how fast
+    boxes move relative to their size, and how much the set of boxes changes.
+    Optionally the YOLO input size is stepped down when even the CPU-limited
+    interval cannot keep up with a busy scene, and back up once there is headroom.
+    """
+
+    def __init__(self, yolo_model, enabled=YOLOConfig.ADAPTIVE_DETECTION):
+        self.yolo_model = yolo_model
+        self.enabled = enabled
+
+        self.yolo = DetectorCadence(
+            YOLOConfig.DETECTION_INTERVAL,
+            YOLOConfig.DETECTION_INTERVAL_MIN,
+            YOLOConfig.DETECTION_INTERVAL_MAX,
+            YOLOConfig.DETECTION_CPU_BUDGET
+        )
+        self.face = DetectorCadence(
+            YOLOConfig.FACE_INTERVAL,
+            YOLOConfig.FACE_INTERVAL_MIN,
+            YOLOConfig.FACE_INTERVAL_MAX,
+            YOLOConfig.FACE_CPU_BUDGET
+        )
+
+        self.activity = 1.0  # Start fresh, then relax once the scene is known
+        self._last_count = None
+
+        # Input size adaptation walks YOLOConfig.ADAPTIVE_INPUT_SIZES, largest first
+        self.input_sizes = sorted(YOLOConfig.ADAPTIVE_INPUT_SIZES, reverse=True)
+        self.input_level = 0
+        self._last_size_change = 0.0
+
+    def update(self, tracks, count, timestamp):
+        """Re-measure activity and re-tune the YOLO cadence after a result with `count` detections arrived"""
+        if not self.enabled:
+            return
+
+        # Tracks the latest pass did not see carry a stale velocity and would count as new forever
+        tracks = [track for track in tracks if not track.missed]
+        raw = max(self.motion(tracks), self.churn(tracks, count))
+        self.activity = 0.5 * self.activity + 0.5 * min(raw, 1.0)
+
+        self.yolo.adapt(self.activity)
+        if YOLOConfig.ADAPTIVE_INPUT_SIZE:
+            self.adapt_input_size(timestamp)
+
+    def update_face(self):
+        """Re-tune the face cadence after a face result arrived
+
+        Runs on face results rather than YOLO ones, so the FACE_CPU_BUDGET floor
+        still applies while object detection is off or the motion gate skips it.
+        """
+        if not self.enabled:
+            return
+        self.face.adapt(self.activity)
+
+    def motion(self, tracks):
+        """Mean box speed in box diagonals per second, scaled so ACTIVITY_SPEED_SCALE counts as fully active"""
+        if not tracks:
+            return 0.0
+        speeds = [
+            np.hypot(*track.velocity) / max(np.hypot(*track.box[2:]), 1.0)
+            for track in tracks
+        ]
+        return float(np.mean(speeds)) / YOLOConfig.ACTIVITY_SPEED_SCALE
+
+    def churn(self, tracks, count):
+        """Share of boxes that appeared or disappeared since the previous detection pass"""
+        previous = self._last_count
+        self._last_count = count
+        new_tracks = sum(1 for track in tracks if track.hits == 1)
+        if previous is None:
+            return 0.0
+        changed = max(abs(count - previous), new_tracks)
+        return changed / max(count, previous, 1)
+
+    def adapt_input_size(self, timestamp):
+        """Trade YOLO input resolution for cadence when the CPU budget is the limiting factor"""
+        if timestamp - self._last_size_change < YOLOConfig.ADAPTIVE_INPUT_COOLDOWN:
+            return
+
+        wanted = self.yolo.max_interval - self.activity * (self.yolo.max_interval - self.yolo.min_interval)
+        floor = self.yolo.budget_interval()
+        level = self.input_level
+        if floor > wanted * 1.5 and level < len(self.input_sizes) - 1:
+            level += 1  # Busy scene the detector cannot keep up with at this size
+        elif floor < wanted * 0.5 and level > 0:
+            level -= 1  # Plenty of headroom, get the resolution back
+
+        if level != self.input_level:
+            self.input_level = level
+            size = self.input_sizes[level]
+            self.yolo_model.input_size = (size, size)
+            self.yolo.latency = None  # Latency at the old size no longer applies
+            self._last_size_change = timestamp
+            print(f"YOLO input size set to {size}x{size}")
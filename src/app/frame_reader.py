@@ -0,0 +1,178 @@
+import time
+import threading
+from collections import deque
+import cv2
+from config import YOLOConfig
+from utils.metrics import metrics
+from utils.frame_pool import frame_pool
+
+class FrameReader:
+    """Background thread that drains a capture device and publishes only the newest frame
+
+    Frames are decoded (or downscaled) straight into pooled buffers and handed
+    out by read() as PooledFrames. The reader holds a reference to each of the
+    newest CAPTURE_BUFFERS frames, so a frame stays valid until that many newer
+    ones have been captured. Stages that keep a frame longer (the detection
+    workers) retain() it instead of copying, and release() it when done.
+    """
+
+    def __init__(self, cap, target_size=None, num_buffers=YOLOConfig.CAPTURE_BUFFERS,
+                 pace_fps=None, loop=False, keep_full=False):
+        self.cap = cap
+        self.target_size = target_size  # (width, height) to downscale to, or None
+        
+        # With keep_full, the undownscaled frames are kept alongside so tiled detection can use them
+        self.keep_full = keep_full
+        self.num_buffers = max(1, num_buffers)
+        self._recent = deque()  # (sequence, frame, full frame or None) the reader holds references to
+        self._capture_shape = None
+        
+        # Video files stand in for cameras by playing at their own rate, optionally looping
+        self.pace_interval = 1.0 / pace_fps if pace_fps else None
+        self.loop = loop
+        self._next_capture = None
+        self._raw = None
+
+        self._condition = threading.Condition()
+        self._frame = None
+        self.sequence = 0
+        self.timestamp = 0
+        self.failed = False
+
+        # Frames replaced before anyone read them
+        self.frames_captured = 0
+        self.frames_dropped = 0
+        self._last_read_sequence = 0
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the capture thread"""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the capture thread and wake any waiting readers"""
+        self._stop_event.set()
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+        
+        # Hand the held frames back; stages that retained one keep it until they release it
+        with self._condition:
+            while self._recent:
+                self._release_entry(self._recent.popleft())
+            self._frame = None
+
+    def wait(self, after_sequence=0, timeout=YOLOConfig.CAPTURE_TIMEOUT):
+        """Block until a frame newer than after_sequence exists; False on timeout or failure"""
+        deadline = time.time() + timeout
+        with self._condition:
+            while self.sequence <= after_sequence and not self.failed and not self._stop_event.is_set():
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return self.sequence > after_sequence
+
+    def read(self, after_sequence=0, timeout=YOLOConfig.CAPTURE_TIMEOUT):
+        """Wait for a frame newer than after_sequence
+
+        Returns (ret, frame, sequence, timestamp), frame being a PooledFrame.
+        """
+        if not self.wait(after_sequence, timeout):
+            return False, None, self.sequence, self.timestamp
+        with self._condition:
+            self._last_read_sequence = self.sequence
+            return True, self._frame, self.sequence, self.timestamp
+
+    def full_frame(self, sequence):
+        """Full-resolution version of frame `sequence` as a PooledFrame, or None if it was already replaced
+        
+        Without a target size this is the frame itself. The same lifetime rules as read() apply.
+        """
+        with self._condition:
+            for full_sequence, _, full in self._recent:
+                if full_sequence == sequence:
+                    return full
+        return None
+
+    def _run(self):
+        """Capture loop: read, downscale into a pooled buffer, publish"""
+        while not self._stop_event.is_set():
+            if self.pace_interval:
+                now = time.time()
+                if self._next_capture is not None and self._next_capture > now:
+                    self._stop_event.wait(self._next_capture - now)
+                self._next_capture = max(now, self._next_capture or now) + self.pace_interval
+            
+            full = None
+            if self.target_size is None:
+                # Decode straight into a pooled buffer
+                with metrics.span('capture'):
+                    ret, frame = self._read_pooled()
+                full = frame
+            else:
+                with metrics.span('capture'):
+                    if self.keep_full:
+                        ret, full = self._read_pooled()
+                        source = full.array if ret else None
+                    else:
+                        ret, self._raw = self.cap.read(self._raw)
+                        source = self._raw
+                frame = None
+                if ret:
+                    width, height = self.target_size
+                    frame = frame_pool.acquire((height, width) + source.shape[2:], source.dtype)
+                    with metrics.span('resize'):
+                        cv2.resize(source, self.target_size, dst=frame.array,
+                                   interpolation=cv2.INTER_AREA)  # INTER_AREA is best for downsampling
+            timestamp = time.time()
+
+            if not ret and self.loop and self.frames_captured and self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0):
+                continue
+            if not ret:
+                with self._condition:
+                    self.failed = True
+                    self._condition.notify_all()
+                break
+
+            with self._condition:
+                if self.sequence > self._last_read_sequence:
+                    self.frames_dropped += 1
+                    metrics.inc('frames_dropped', reason='capture')
+                self._frame = frame
+                self.sequence += 1
+                self._recent.append((self.sequence, frame, full))
+                if len(self._recent) > self.num_buffers:
+                    self._release_entry(self._recent.popleft())
+                self.timestamp = timestamp
+                self.frames_captured += 1
+                self._condition.notify_all()
+
+    def _read_pooled(self):
+        """Decode the next frame straight into a pooled buffer; returns (ret, PooledFrame)"""
+        pooled = frame_pool.acquire(self._capture_shape) if self._capture_shape else None
+        ret, array = self.cap.read(pooled.array if pooled else None)
+        if not ret:
+            if pooled:
+                pooled.release()
+            return False, None
+        if pooled is None or array is not pooled.array:
+            # First frame, or the device changed size and cv2 allocated a new array
+            if pooled:
+                pooled.release()
+            pooled = frame_pool.adopt(array)
+            self._capture_shape = array.shape
+        return True, pooled
+
+    @staticmethod
+    def _release_entry(entry):
+        """Drop the reader's references to a frame and its full-resolution version"""
+        _, frame, full = entry
+        frame.release()
+        if full is not None and full is not frame:
+            full.release()
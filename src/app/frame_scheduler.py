@@ -0,0 +1,105 @@
+import time
+from contextlib import contextmanager
+from config import YOLOConfig
+from utils.metrics import metrics
+
+class FrameScheduler:
+    """Paces the display loop with deadline sleeps and degrades rendering when over budget
+
+    Degradation levels, applied in order as the frame budget keeps being overrun:
+      1. skip the status overlay
+      2. render the display frame at reduced resolution (the window scales it up)
+      3. drop every other frame from rendering
+    """
+
+    SKIP_OVERLAY = 1
+    REDUCED_DISPLAY = 2
+    DROP_FRAMES = 3
+
+    def __init__(self, target_fps=YOLOConfig.TARGET_FPS, budget_split=YOLOConfig.FRAME_BUDGET_SPLIT):
+        self.frame_interval = 1.0 / target_fps
+        self.budgets = {stage: share * self.frame_interval for stage, share in budget_split.items()}
+
+        self.level = 0
+        self.next_deadline = None
+        self.frame_time = 0.0  # Smoothed busy time per frame
+        self.stage_times = {stage: 0.0 for stage in self.budgets}
+        self._over_count = 0
+        self._under_count = 0
+
+        self.frames = 0
+        self.frames_dropped = 0
+        self._busy = 0.0  # Time spent in stages this frame, excluding idle waits
+
+    def wait(self):
+        """Sleep until the next frame deadline instead of spinning"""
+        if self.next_deadline is not None:
+            remaining = self.next_deadline - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining)
+
+    @contextmanager
+    def stage(self, name):
+        """Time one stage of the frame against its share of the budget"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._busy += elapsed
+            previous = self.stage_times.get(name, elapsed)
+            self.stage_times[name] = 0.9 * previous + 0.1 * elapsed
+
+    def end_frame(self):
+        """Account for the finished frame, adjust degradation and schedule the next deadline"""
+        now = time.perf_counter()
+        busy = self._busy
+        self._busy = 0.0
+        self.frames += 1
+        self.frame_time = 0.9 * self.frame_time + 0.1 * busy
+
+        # Hysteresis so a single slow frame does not flip the level back and forth
+        if self.frame_time > self.frame_interval:
+            self._over_count += 1
+            self._under_count = 0
+        elif self.frame_time < self.frame_interval * YOLOConfig.FRAME_RECOVER_RATIO:
+            self._under_count += 1
+            self._over_count = 0
+        else:
+            self._over_count = self._under_count = 0
+
+        if self._over_count >= YOLOConfig.FRAME_DEGRADE_FRAMES and self.level < self.DROP_FRAMES:
+            self._set_level(self.level + 1)
+        elif self._under_count >= YOLOConfig.FRAME_RECOVER_FRAMES and self.level > 0:
+            self._set_level(self.level - 1)
+
+        # Never schedule in the past, so an overrun does not cause a burst of catch-up frames
+        if self.next_deadline is None:
+            self.next_deadline = now
+        self.next_deadline = max(self.next_deadline + self.frame_interval, now)
+
+    def draw_overlay(self):
+        """Whether the status overlay should be drawn this frame"""
+        return self.level < self.SKIP_OVERLAY
+
+    def display_scale(self):
+        """Scale factor for the rendered display frame"""
+        return YOLOConfig.DEGRADED_DISPLAY_SCALE if self.level >= self.REDUCED_DISPLAY else 1.0
+
+    def drop_frame(self):
+        """Whether this frame should skip rendering entirely"""
+        if self.level >= self.DROP_FRAMES and self.frames % 2 == 1:
+            self.frames_dropped += 1
+            metrics.inc('frames_dropped', reason='render')
+            return True
+        return False
+
+    def _set_level(self, level):
+        """Change degradation level and report which stages are over budget"""
+        over = [f"{stage} {self.stage_times[stage] * 1000:.1f}/{budget * 1000:.1f}ms"
+                for stage, budget in self.budgets.items()
+                if self.stage_times.get(stage, 0.0) > budget]
+        print(f"Frame budget level {self.level} -> {level} "
+              f"(frame {self.frame_time * 1000:.1f}ms; over budget: {', '.join(over) or 'none'})")
+        self.level = level
+        self._over_count = self._under_count = 0
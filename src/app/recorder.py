@@ -0,0 +1,203 @@
+import os
+import time
+import queue
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+import cv2
+from config import YOLOConfig
+from utils.metrics import metrics
+
+class Recorder:
+    """Archives annotated frames through a separate encoder process
+
+    Frames are copied into a ring of shared-memory slots and only the slot
+    index crosses the process boundary, so the display loop pays for one
+    memcpy instead of a video encode. A slot is free again once the encoder
+    has written it. When every slot is taken, the "drop" policy skips the
+    frame and the "block" policy waits up to RECORDING_BLOCK_TIMEOUT for one.
+    The encoder starts a new file every RECORDING_SEGMENT_SECONDS or once the
+    current one reaches RECORDING_SEGMENT_BYTES. If it cannot write, it
+    reports back and exits, and `error` says why.
+    """
+
+    def __init__(self, directory=YOLOConfig.RECORDING_DIR, fps=YOLOConfig.RECORDING_FPS,
+                 slots=YOLOConfig.RECORDING_QUEUE_SIZE, policy=YOLOConfig.RECORDING_POLICY):
+        if policy not in ('drop', 'block'):
+            raise ValueError(f"Unknown recording policy: {policy}")
+        self.directory = directory
+        self.fps = fps
+        self.slots = slots
+        self.policy = policy
+
+        # Spawn rather than fork, so the encoder does not inherit the capture and detection threads
+        self._context = multiprocessing.get_context('spawn')
+        self._process = None
+        self._memory = None
+        self._views = []
+        self._shape = None
+        self._frame_queue = None  # Slot indices waiting to be encoded
+        self._free_queue = None  # Slot indices the encoder has finished with
+        self._error_queue = None  # Failure messages from the encoder
+        self.error = None
+
+        self._next_frame_time = 0.0
+        self.frames_recorded = 0
+        self.frames_dropped = 0
+
+    @property
+    def recording(self):
+        return self._process is not None
+
+    def write(self, frame, timestamp=None):
+        """Hand a frame to the encoder without waiting for it to be encoded
+
+        Frames arriving faster than RECORDING_FPS are skipped. Returns True if
+        the frame was queued for recording.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        if timestamp < self._next_frame_time:
+            return False
+        self._next_frame_time = max(self._next_frame_time + 1.0 / self.fps, timestamp)
+
+        if frame.shape != self._shape:
+            # The encoder's frame size is fixed, so a new size starts a new process and segment
+            self.stop()
+            try:
+                self._start(frame.shape)
+            except OSError as e:
+                self.error = f"Could not start recording in {self.directory}: {str(e)}"
+                return False
+        elif self._failed():
+            return False
+
+        try:
+            if self.policy == 'block':
+                slot = self._free_queue.get(timeout=YOLOConfig.RECORDING_BLOCK_TIMEOUT)
+            else:
+                slot = self._free_queue.get_nowait()
+        except queue.Empty:
+            self.frames_dropped += 1
+            metrics.inc('frames_dropped', reason='recorder')
+            return False
+
+        with metrics.span('record'):
+            np.copyto(self._views[slot], frame)
+            self._frame_queue.put(slot)
+        self.frames_recorded += 1
+        return True
+
+    def _failed(self):
+        """Pick up a failure reported by the encoder, stopping the recording if there is one"""
+        try:
+            error = self._error_queue.get_nowait()
+        except queue.Empty:
+            return False
+        self.stop()
+        self.error = error
+        return True
+
+    def stop(self):
+        """Let the encoder finish the queued frames, then release the shared memory"""
+        if self._process is None:
+            return
+        self._frame_queue.put(None)
+        self._process.join(timeout=YOLOConfig.RECORDING_STOP_TIMEOUT)
+        if self._process.is_alive():
+            print("Recorder did not finish in time, terminating it")
+            self._process.terminate()
+            self._process.join()
+
+        self._views = []
+        self._memory.close()
+        self._memory.unlink()
+        self._memory = None
+        self._process = None
+        self._shape = None
+
+    def _start(self, shape):
+        """Allocate shared slots for frames of this shape and start the encoder process"""
+        os.makedirs(self.directory, exist_ok=True)
+        self.error = None
+        frame_bytes = int(np.prod(shape))
+        self._memory = shared_memory.SharedMemory(create=True, size=frame_bytes * self.slots)
+        self._views = [
+            np.ndarray(shape, dtype=np.uint8, buffer=self._memory.buf, offset=i * frame_bytes)
+            for i in range(self.slots)
+        ]
+        self._shape = shape
+
+        self._frame_queue = self._context.Queue(maxsize=self.slots + 1)  # Room for the stop marker
+        self._free_queue = self._context.Queue()
+        self._error_queue = self._context.Queue()
+        for slot in range(self.slots):
+            self._free_queue.put(slot)
+
+        self._process = self._context.Process(
+            target=encode_segments,
+            args=(self._memory.name, shape, self.slots, self._frame_queue, self._free_queue,
+                  self._error_queue, self.directory, self.fps),
+            daemon=True
+        )
+        self._process.start()
+
+def encode_segments(memory_name, shape, slots, frame_queue, free_queue, error_queue, directory, fps,
+                    segment_seconds=YOLOConfig.RECORDING_SEGMENT_SECONDS,
+                    segment_bytes=YOLOConfig.RECORDING_SEGMENT_BYTES):
+    """Encoder process: write queued slots to video files, rotating segments by time and size
+
+    Exits after putting a message on error_queue if a segment cannot be written.
+    """
+    memory = shared_memory.SharedMemory(name=memory_name)
+    frame_bytes = int(np.prod(shape))
+    views = [
+        np.ndarray(shape, dtype=np.uint8, buffer=memory.buf, offset=i * frame_bytes)
+        for i in range(slots)
+    ]
+    height, width = shape[:2]
+    fourcc = cv2.VideoWriter_fourcc(*YOLOConfig.RECORDING_FOURCC)
+
+    writer = None
+    path = None
+    segment = 0
+    segment_start = 0.0
+    segment_frames = 0
+    try:
+        while True:
+            slot = frame_queue.get()
+            if slot is None:
+                break
+
+            # Size is checked once a second of video, the file only grows as frames are flushed
+            rotate = writer is None or time.time() - segment_start >= segment_seconds
+            if not rotate and segment_frames % max(1, int(fps)) == 0:
+                rotate = os.path.getsize(path) >= segment_bytes
+            if rotate:
+                if writer is not None:
+                    writer.release()
+                stamp = time.strftime('%Y%m%d_%H%M%S')
+                path = os.path.join(directory, f"recording_{stamp}_{segment:03d}.{YOLOConfig.RECORDING_EXTENSION}")
+                segment += 1
+                writer = cv2.VideoWriter(path, fourcc, fps, (width, height))
+                if not writer.isOpened():
+                    # e.g. a fourcc the extension's container or the OpenCV build does not support
+                    error_queue.put(f"Could not open {path} for writing with fourcc "
+                                    f"'{YOLOConfig.RECORDING_FOURCC}'")
+                    free_queue.put(slot)
+                    break
+                segment_start = time.time()
+                segment_frames = 0
+                print(f"Recording to {path}")
+
+            try:
+                writer.write(views[slot])
+                segment_frames += 1
+            finally:
+                free_queue.put(slot)
+    except Exception as e:
+        error_queue.put(f"Recorder failed: {str(e)}")
+    finally:
+        if writer is not None:
+            writer.release()
+        views = []
+        memory.close()
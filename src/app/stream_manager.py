@@ -0,0 +1,178 @@
+import queue
+import threading
+import cv2
+from config import YOLOConfig
+from app.frame_reader import FrameReader
+from app.detection_manager import DetectionManager
+from detection.detector_thread import FaceDetectorThread, put_latest
+from detection.detections import Detections
+from utils.frame_pool import release_item
+
+class StreamQueues:
+    """Per-stream detection queues, in the same shape AppManager provides for one camera"""
+
+    def __init__(self):
+        self.face_queue = queue.Queue(maxsize=1)
+        self.face_result_queue = queue.Queue(maxsize=1)
+        self.yolo_queue = queue.Queue(maxsize=1)
+        self.yolo_result_queue = queue.Queue(maxsize=1)
+
+class CameraStream:
+    """One camera or stand-in video file with its own capture thread and detection state"""
+
+    def __init__(self, app_manager, source, yolo_model, face_model):
+        self.source = source
+        self.name = f"Camera {source}" if isinstance(source, int) else str(source)
+
+        self.cap = cv2.VideoCapture(source)
+        if not self.cap.isOpened():
+            raise RuntimeError(f"Failed to open source {source}")
+
+        # Video files are played at their own rate and looped so they behave like cameras
+        is_file = not isinstance(source, int)
+        pace_fps = (self.cap.get(cv2.CAP_PROP_FPS) or YOLOConfig.TARGET_FPS) if is_file else None
+        if not is_file:
+            self.cap.set(cv2.CAP_PROP_FPS, YOLOConfig.TARGET_FPS)
+
+        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        target_size = None
+        if width > YOLOConfig.MAX_CAMERA_WIDTH or height > YOLOConfig.MAX_CAMERA_HEIGHT:
+            scale = min(YOLOConfig.MAX_CAMERA_WIDTH / width, YOLOConfig.MAX_CAMERA_HEIGHT / height)
+            target_size = (int(width * scale), int(height * scale))
+        print(f"{self.name}: {width}x{height}")
+
+        self.reader = FrameReader(self.cap, target_size, pace_fps=pace_fps, loop=is_file)
+
+        # Shared models, private queues, tracker and face-track state
+        self.queues = StreamQueues()
+        self.detection_mgr = DetectionManager(app_manager, yolo_model, face_model, queues=self.queues)
+        self.face_detector = FaceDetectorThread(
+            face_model, self.queues.face_queue, self.queues.face_result_queue, app_manager.stop_event
+        )
+
+        self.frame_sequence = 0
+        self.frame_timestamp = 0
+        self.last_frame = None
+        self.last_results = Detections.empty()
+        self.failed = False  # The capture device stopped delivering frames
+
+        # Smoothed display rate and capture-to-display latency
+        self.fps = 0.0
+        self.latency = 0.0
+        self._last_display_time = None
+
+    def start(self):
+        self.reader.start()
+
+    def close(self):
+        self.reader.stop()
+        self.cap.release()
+        if self.last_frame is not None:
+            self.last_frame.release()
+            self.last_frame = None
+
+    def poll(self):
+        """Process the newest frame if there is one; returns True if the stream advanced or just failed"""
+        if self.failed:
+            return False
+        ret, frame, sequence, timestamp = self.reader.read(self.frame_sequence, timeout=0)
+        if not ret:
+            if self.reader.failed:
+                # Reported once, and the stream is redrawn marked as failed
+                print(f"{self.name}: failed to read from source {self.source}")
+                self.failed = True
+                return True
+            return False
+        self.frame_sequence = sequence
+        self.frame_timestamp = timestamp
+        self.last_results = self.detection_mgr.process_frame(frame, timestamp)
+        # Kept for redraws after the reader has moved on, so it holds its own reference
+        if self.last_frame is not None:
+            self.last_frame.release()
+        self.last_frame = frame.retain()
+        return True
+
+    def mark_displayed(self, now):
+        """Update FPS and latency counters after the stream's frame was shown"""
+        if self._last_display_time is not None:
+            interval = now - self._last_display_time
+            if interval > 0:
+                self.fps = 0.9 * self.fps + 0.1 * (1.0 / interval)
+        self._last_display_time = now
+        self.latency = 0.9 * self.latency + 0.1 * (now - self.frame_timestamp)
+
+class InferenceScheduler:
+    """Serves every stream's detection queues from one thread with shared models
+
+    Each round takes at most one pending YOLO frame per stream and runs them as a
+    single batch, then processes one pending face frame, rotating which stream
+    goes first so no camera can starve the others.
+    """
+
+    def __init__(self, streams, yolo_model, stop_event):
+        self.streams = streams
+        self.yolo_model = yolo_model
+        self.stop_event = stop_event
+        self._start = 0
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run, daemon=True)
+        self._thread.start()
+
+    def join(self, timeout=1.0):
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+
+    def run(self):
+        print("Inference scheduler started")
+        while not self.stop_event.is_set():
+            order = self.streams[self._start:] + self.streams[:self._start]
+            self._start = (self._start + 1) % max(1, len(self.streams))
+
+            did_work = self.run_yolo(order)
+            did_work = self.run_face(order) or did_work
+            if not did_work:
+                self.stop_event.wait(0.005)
+        print("Inference scheduler ended")
+
+    def run_yolo(self, order):
+        """One batched forward pass over the newest pending frame of each stream"""
+        pending = []
+        for stream in order:
+            try:
+                pending.append((stream, stream.queues.yolo_queue.get_nowait()))
+            except queue.Empty:
+                continue
+        if not pending:
+            return False
+
+        try:
+            results = self.yolo_model.detect_batch([frame.array for _, (_, frame, _) in pending])
+        except Exception as e:
+            print(f"YOLO scheduler error: {str(e)}")
+            return True
+        finally:
+            for _, item in pending:
+                release_item(item)
+
+        for (stream, (timestamp, _, result_scale)), result in zip(pending, results):
+            put_latest(stream.queues.yolo_result_queue, (timestamp, result, result_scale))
+        return True
+
+    def run_face(self, order):
+        """Face detection for the first stream in rotation order that has a pending frame"""
+        for stream in order:
+            try:
+                timestamp, frame, rois = stream.queues.face_queue.get_nowait()
+            except queue.Empty:
+                continue
+            try:
+                put_latest(stream.queues.face_result_queue, stream.face_detector.process(frame.array, timestamp, rois))
+            except Exception as e:
+                print(f"Face scheduler error ({stream.name}): {str(e)}")
+            finally:
+                frame.release()
+            return True
+        return False
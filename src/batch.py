@@ -0,0 +1,293 @@
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import contextlib
+import threading
+import cv2
+from detection.model import YOLOModel
+from detection.face_model import FaceModel
+from visualization.draw import draw_bounding_boxes
+from config import YOLOConfig
+from app.app_manager import AppManager
+from utils.metrics import metrics
+from app.detection_manager import DetectionManager
+from detection.micro_batcher import MicroBatcher
+from detection.detections import Detections
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+# Marks the end of the frame stream on the pipeline queues
+END_OF_STREAM = None
+
+def iter_frames(inputs):
+    """Yield (source, frame_index, frame, fps) from video files, image files and image folders"""
+    for path in inputs:
+        if os.path.isdir(path):
+            images = sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+            for image_path in images:
+                frame = cv2.imread(image_path)
+                if frame is None:
+                    print(f"Could not read image {image_path}", file=sys.stderr)
+                    continue
+                yield image_path, 0, frame, None
+        elif path.lower().endswith(IMAGE_EXTENSIONS):
+            frame = cv2.imread(path)
+            if frame is None:
+                print(f"Could not read image {path}", file=sys.stderr)
+                continue
+            yield path, 0, frame, None
+        else:
+            cap = cv2.VideoCapture(path)
+            if not cap.isOpened():
+                print(f"Could not open video {path}", file=sys.stderr)
+                continue
+            fps = cap.get(cv2.CAP_PROP_FPS) or YOLOConfig.TARGET_FPS
+            index = 0
+            try:
+                while True:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    yield path, index, frame, fps
+                    index += 1
+            finally:
+                cap.release()
+
+def common_root(inputs):
+    """Deepest folder containing every input, so annotated outputs keep distinct relative paths"""
+    folders = [os.path.abspath(path if os.path.isdir(path) else os.path.dirname(path) or '.')
+               for path in inputs]
+    return os.path.commonpath(folders)
+
+class BatchPipeline:
+    """Decode -> detect -> annotate/encode pipeline over bounded queues, with no pacing or GUI"""
+
+    def __init__(self, app, face_model, args, stdout=sys.stdout):
+        self.app = app
+        self.face_model = face_model
+        self.args = args
+        self.stdout = stdout  # Where '--output -' writes, kept free of diagnostics
+        self.input_root = common_root(args.inputs)
+
+        self.frame_queue = queue.Queue(maxsize=args.queue_size)
+        self.result_queue = queue.Queue(maxsize=args.queue_size)
+
+        self.frames_decoded = 0
+        self.frames_written = 0
+        self.video_writers = {}
+        
+        # With batching, one shared network serves all workers through a micro-batcher
+        self.batcher = None
+        if args.batch_size > 1 and not args.no_objects:
+            self.batcher = MicroBatcher(self.load_model(), batch_size=args.batch_size,
+                                        max_wait=args.batch_wait)
+
+    def run(self):
+        """Process every input frame and return (frames, seconds)"""
+        start = time.perf_counter()
+
+        if self.batcher:
+            self.batcher.start()
+        
+        threads = [threading.Thread(target=self.decode, daemon=True)]
+        for _ in range(self.args.workers):
+            threads.append(threading.Thread(target=self.detect, args=(self.load_detector(),), daemon=True))
+        for thread in threads:
+            thread.start()
+
+        try:
+            self.write()
+        finally:
+            self.app.stop_event.set()
+            if self.batcher:
+                self.batcher.stop()
+            for writer in self.video_writers.values():
+                if writer is not None:
+                    writer.release()
+
+        return self.frames_written, time.perf_counter() - start
+
+    def load_model(self):
+        """Load a YOLO network"""
+        yolo_model = YOLOModel()
+        yolo_model.load_model(YOLOConfig.WEIGHTS_PATH, YOLOConfig.CONFIG_PATH)
+        return yolo_model
+
+    def load_detector(self):
+        """Without batching each worker gets its own network, since a cv2.dnn Net is not safe to share across threads"""
+        if self.batcher:
+            return DetectionManager(self.app, self.batcher.yolo_model, self.face_model)
+        return DetectionManager(self.app, self.load_model(), self.face_model)
+
+    def decode(self):
+        """Stage 1: read frames from the inputs, blocking when detection falls behind"""
+        try:
+            for sequence, item in enumerate(iter_frames(self.args.inputs)):
+                if self.app.stop_event.is_set():
+                    break
+                self.frame_queue.put((sequence, item))
+                self.frames_decoded += 1
+        finally:
+            for _ in range(self.args.workers):
+                self.frame_queue.put(END_OF_STREAM)
+
+    def detect(self, detection_mgr):
+        """Stage 2: run detection on frames from the decode stage"""
+        while True:
+            work = self.frame_queue.get()
+            if work is END_OF_STREAM:
+                self.result_queue.put(END_OF_STREAM)
+                return
+
+            sequence, (source, index, frame, fps) = work
+            try:
+                yolo_results = self.batcher.detect(frame) if self.batcher else None
+                results = detection_mgr.detect(
+                    frame,
+                    detect_objects=not self.args.no_objects,
+                    detect_faces=not self.args.no_faces,
+                    yolo_results=yolo_results
+                )
+            except Exception as e:
+                print(f"Detection failed on {source}#{index}: {str(e)}", file=sys.stderr)
+                results = Detections.empty()
+            self.result_queue.put((sequence, source, index, frame, fps, results, detection_mgr.classes))
+
+    def write(self):
+        """Stage 3: write detections in input order, optionally annotating and encoding frames"""
+        output = open(self.args.output, 'w') if self.args.output != '-' else self.stdout
+        pending = {}
+        next_sequence = 0
+        finished_workers = 0
+
+        try:
+            while finished_workers < self.args.workers:
+                if not self.app.running:
+                    break
+                try:
+                    item = self.result_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if item is END_OF_STREAM:
+                    finished_workers += 1
+                    continue
+
+                # Workers finish out of order; release results in input order
+                pending[item[0]] = item
+                while next_sequence in pending:
+                    self.write_result(output, *pending.pop(next_sequence)[1:])
+                    next_sequence += 1
+
+            for sequence in sorted(pending):
+                self.write_result(output, *pending[sequence][1:])
+        finally:
+            if output is not self.stdout:
+                output.close()
+
+    def write_result(self, output, source, index, frame, fps, results, classes):
+        """Write one frame's detections as a JSON line and its annotated frame if requested"""
+        record = {
+            'source': source,
+            'frame': index,
+            'detections': [
+                {
+                    'class': classes[class_id],
+                    'class_id': class_id,
+                    'confidence': round(confidence, 4),
+                    'box': box
+                }
+                for box, class_id, confidence, _ in results.rows()
+            ]
+        }
+        output.write(json.dumps(record) + '\n')
+        self.frames_written += 1
+
+        if self.args.annotate_dir:
+            annotated = draw_bounding_boxes(frame, results, classes)
+            self.encode(source, fps, annotated)
+
+    def encode(self, source, fps, frame):
+        """Save an annotated image, or append the frame to the source's annotated video
+
+        Outputs mirror each source's path below the common input folder, so
+        same-named files from different folders do not overwrite each other.
+        """
+        path = os.path.join(self.args.annotate_dir,
+                            os.path.relpath(os.path.abspath(source), self.input_root))
+        if fps is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if not cv2.imwrite(path, frame):
+                print(f"Could not write annotated image {path}", file=sys.stderr)
+            return
+
+        if source not in self.video_writers:
+            path = os.path.splitext(path)[0] + '.mp4'
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            height, width = frame.shape[:2]
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+            if not writer.isOpened():
+                # Remembered as None so the failure is reported once, not for every frame
+                print(f"Could not open video writer for {path}", file=sys.stderr)
+                writer = None
+            self.video_writers[source] = writer
+        writer = self.video_writers[source]
+        if writer is not None:
+            writer.write(frame)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run detection over video files and image folders without a display")
+    parser.add_argument('inputs', nargs='+', help="Video files, image files or folders of images")
+    parser.add_argument('--output', default='detections.jsonl', help="JSON lines output file ('-' for stdout)")
+    parser.add_argument('--annotate-dir', help="Write annotated images/videos to this folder")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="Detection worker threads (use at least --batch-size to fill batches)")
+    parser.add_argument('--batch-size', type=int, default=YOLOConfig.YOLO_BATCH_SIZE,
+                        help="Frames per YOLO forward pass (1 disables batching)")
+    parser.add_argument('--batch-wait', type=float, default=YOLOConfig.YOLO_BATCH_MAX_WAIT,
+                        help="Seconds a partial batch waits for more frames")
+    parser.add_argument('--queue-size', type=int, default=8, help="Frames buffered between pipeline stages")
+    parser.add_argument('--faces-dir', default='training_data/faces', help="Face gallery folder")
+    parser.add_argument('--no-faces', action='store_true', help="Skip face recognition")
+    parser.add_argument('--no-objects', action='store_true', help="Skip YOLO object detection")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    
+    # Stdout is reserved for '--output -'; model loading and other diagnostics print to stderr
+    stdout = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        run(args, stdout)
+
+def run(args, stdout):
+    app = AppManager()
+
+    try:
+        if YOLOConfig.METRICS_ENABLED:
+            metrics.start_server()
+
+        # The face gallery is read-only during matching, so one model is shared by all workers
+        face_model = FaceModel()
+        if not args.no_faces:
+            face_model.load_faces(args.faces_dir)
+
+        if args.annotate_dir:
+            os.makedirs(args.annotate_dir, exist_ok=True)
+
+        frames, elapsed = BatchPipeline(app, face_model, args, stdout).run()
+        fps = frames / elapsed if elapsed > 0 else 0.0
+        print(f"Processed {frames} frames in {elapsed:.1f}s ({fps:.1f} FPS)", file=sys.stderr)
+    except Exception as e:
+        print(f"Batch processing error: {str(e)}", file=sys.stderr)
+    finally:
+        # No windows or capture device to release, just stop any remaining workers
+        app.stop_event.set()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+import os
+import sys
+import json
+import time
+import types
+import argparse
+import contextlib
+import platform
+import cv2
+import numpy as np
+from detection.model import YOLOModel
+from detection.face_model import FaceModel
+from detection.face_index import FaceIndex
+from detection.detections import Detections, SOURCE_FACE
+from visualization.draw import draw_bounding_boxes
+from visualization.text_utils import add_status_text
+from utils.result_processor import ResultProcessor
+from visualization.display_scaler import DisplayScaler
+
+# Deployment capture sizes and the displays the frames are letterboxed onto
+FRAME_SIZES = {'720p': (1280, 720), '1080p': (1920, 1080)}
+DISPLAY_SIZE = (1920, 1200)
+FULLSCREEN_4K_SIZE = (3840, 2160)
+
+BOX_COUNTS = (0, 5, 20, 50)
+GALLERY_SIZES = (10, 100, 1000, 10000)
+FACES_PER_FRAME = 5
+
+# Rows per YOLOv3 output layer at a 416x416 input (3 anchors on 13x13, 26x26 and 52x52 grids)
+YOLO_LAYER_ROWS = (507, 2028, 8112)
+
+PERCENTILES = (50, 90, 95, 99)
+
+def summarize(samples):
+    """Percentiles and spread of a list of durations, in milliseconds"""
+    ms = np.asarray(samples) * 1000.0
+    stats = {f'p{p}': round(float(np.percentile(ms, p)), 4) for p in PERCENTILES}
+    stats.update(
+        mean=round(float(ms.mean()), 4),
+        min=round(float(ms.min()), 4),
+        max=round(float(ms.max()), 4),
+        iterations=len(ms)
+    )
+    return stats
+
+class Benchmark:
+    """Times one stage at a time and collects the results for JSON output"""
+
+    def __init__(self, iterations, warmup, only=None):
+        self.iterations = iterations
+        self.warmup = warmup
+        self.only = only
+        self.results = {}
+
+    def run(self, name, fn, setup=None):
+        """Time fn(*setup()) repeatedly; setup runs outside the timed region"""
+        if self.only and not any(pattern in name for pattern in self.only):
+            return
+
+        samples = []
+        for i in range(self.warmup + self.iterations):
+            args = setup() if setup else ()
+            start = time.perf_counter()
+            fn(*args)
+            elapsed = time.perf_counter() - start
+            if i >= self.warmup:
+                samples.append(elapsed)
+
+        self.results[name] = summarize(samples)
+        print(f"{name:<40} p50 {self.results[name]['p50']:8.3f} ms  "
+              f"p99 {self.results[name]['p99']:8.3f} ms", file=sys.stderr)
+
+def load_frames(source):
+    """One frame per deployment size, from a recorded image/video or synthetic noise"""
+    base = None
+    if source:
+        if source.lower().endswith(('.jpg', '.jpeg', '.png', '.bmp')):
+            base = cv2.imread(source)
+        else:
+            cap = cv2.VideoCapture(source)
+            ret, base = cap.read()
+            cap.release()
+            base = base if ret else None
+        if base is None:
+            raise RuntimeError(f"Could not read a frame from {source}")
+
+    frames = {}
+    rng = np.random.default_rng(0)
+    for label, (width, height) in FRAME_SIZES.items():
+        if base is not None:
+            frames[label] = cv2.resize(base, (width, height), interpolation=cv2.INTER_AREA)
+        else:
+            frames[label] = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    return frames
+
+def random_boxes(rng, count, width, height):
+    """Plausible xywh boxes that fit inside the frame"""
+    w = rng.integers(width // 20, width // 4, count)
+    h = rng.integers(height // 10, height // 2, count)
+    x = rng.integers(0, width - w)
+    y = rng.integers(0, height - h)
+    return np.stack([x, y, w, h], axis=1).tolist()
+
+def synthetic_yolo_outputs(rng, num_classes, num_objects=20):
+    """Raw output layers with mostly background rows and a few overlapping detections per object"""
+    outputs = []
+    for rows in YOLO_LAYER_ROWS:
+        output = np.zeros((rows, 5 + num_classes), dtype=np.float32)
+        output[:, :4] = rng.random((rows, 4), dtype=np.float32)
+        output[:, 4:] = rng.random((rows, 1 + num_classes), dtype=np.float32) * 0.05
+        outputs.append(output)
+
+    # Each object shows up in several neighbouring cells, as a real network output would
+    for _ in range(num_objects):
+        layer = outputs[rng.integers(len(outputs))]
+        class_id = rng.integers(num_classes)
+        center = rng.random(2) * 0.8 + 0.1
+        size = rng.random(2) * 0.3 + 0.05
+        for row in rng.integers(0, len(layer), 6):
+            layer[row, :2] = center + rng.normal(0, 0.01, 2)
+            layer[row, 2:4] = size * rng.uniform(0.9, 1.1)
+            layer[row, 5 + class_id] = rng.uniform(0.6, 0.99)
+    return outputs
+
+def bench_letterbox(bench, frames):
+    for suffix, (display_width, display_height) in (('', DISPLAY_SIZE), ('@4k', FULLSCREEN_4K_SIZE)):
+        for label, frame in frames.items():
+            for fill_screen in (False, True):
+                mode = 'fill' if fill_screen else 'fit'
+                # Steady state: geometry and canvas are cached after the warmup iterations
+                scaler = DisplayScaler()
+                bench.run(f'letterbox/{mode}/{label}{suffix}',
+                          lambda: scaler.render(frame, display_width, display_height, fill_screen))
+
+def bench_draw(bench, frames, classes, rng):
+    for label, frame in frames.items():
+        height, width = frame.shape[:2]
+        for count in BOX_COUNTS:
+            detections = Detections.from_arrays(
+                random_boxes(rng, count, width, height),
+                rng.integers(0, len(classes), count),
+                rng.uniform(0.5, 1.0, count),
+                np.arange(count)
+            )
+            # Boxes persist across frames between detections, so the same results are redrawn each time
+            bench.run(f'draw_bounding_boxes/{count}/{label}',
+                      lambda image: draw_bounding_boxes(image, detections, classes),
+                      setup=lambda: (frame.copy(),))
+
+def bench_status(bench, frames):
+    app = types.SimpleNamespace(face_detection_enabled=True, object_detection_enabled=True)
+    for label, frame in frames.items():
+        bench.run(f'add_status_text/{label}',
+                  lambda image: add_status_text(image, app),
+                  setup=lambda: (frame.copy(),))
+
+def bench_yolo_decode(bench, yolo_model, rng):
+    outputs = synthetic_yolo_outputs(rng, len(yolo_model.class_filter.names))
+    for label, (width, height) in FRAME_SIZES.items():
+        bench.run(f'yolo_decode/vectorized/{label}',
+                  lambda: yolo_model.decode_outputs(outputs, width, height))
+        bench.run(f'yolo_decode/loop/{label}',
+                  lambda: yolo_model.decode_outputs_loop(outputs, width, height))
+
+        decoded = yolo_model.decode_outputs(outputs, width, height)
+        bench.run(f'yolo_nms/{label}', lambda: yolo_model.apply_nms(*decoded))
+
+def bench_face_matching(bench, rng):
+    face_model = FaceModel()
+    for size in GALLERY_SIZES:
+        gallery = rng.normal(0, 0.1, (size, 128)).astype(np.float32)
+        face_model.face_index = FaceIndex(gallery)
+        face_model.known_face_encodings = face_model.face_index.encodings
+        face_model.known_face_names = [f'person_{i}' for i in range(size)]
+
+        # Probes are noisy copies of gallery entries, so most of them match
+        probes = gallery[rng.integers(0, size, FACES_PER_FRAME)] + rng.normal(0, 0.02, (FACES_PER_FRAME, 128))
+        bench.run(f'face_match/{size}', lambda: face_model.match_faces(list(probes)))
+
+def bench_combine(bench, yolo_classes, rng):
+    width, height = FRAME_SIZES['1080p']
+    processor = ResultProcessor()
+    for count in BOX_COUNTS:
+        yolo_results = Detections.from_arrays(
+            random_boxes(rng, count, width, height),
+            rng.integers(0, len(yolo_classes), count),
+            rng.uniform(0.5, 1.0, count),
+            np.arange(count)
+        )
+        face_results = Detections.from_arrays(
+            random_boxes(rng, FACES_PER_FRAME, width, height),
+            rng.integers(-1, 3, FACES_PER_FRAME),
+            rng.uniform(0.5, 1.0, FACES_PER_FRAME),
+            np.arange(FACES_PER_FRAME),
+            source=SOURCE_FACE
+        )
+        bench.run(f'combine_results/{count}',
+                  lambda: processor.combine_results(yolo_results, face_results, yolo_classes))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Time each hot pipeline stage without a camera or display")
+    parser.add_argument('--output', default='-', help="JSON results file ('-' for stdout)")
+    parser.add_argument('--iterations', type=int, default=200, help="Timed iterations per stage")
+    parser.add_argument('--warmup', type=int, default=20, help="Untimed iterations before each stage")
+    parser.add_argument('--frames', help="Recorded image or video to use instead of synthetic frames")
+    parser.add_argument('--only', nargs='+', help="Only run stages whose name contains one of these")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    rng = np.random.default_rng(0)
+    bench = Benchmark(args.iterations, args.warmup, args.only)
+
+    # Stdout is reserved for the JSON report; model and index setup messages print to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        # Decode and NMS only need the class list, not the network weights
+        yolo_model = YOLOModel()
+        yolo_classes = yolo_model.class_filter.names
+        classes = yolo_classes + ['person_0', 'person_1', 'person_2']
+
+        frames = load_frames(args.frames)
+        bench_letterbox(bench, frames)
+        bench_draw(bench, frames, classes, rng)
+        bench_status(bench, frames)
+        bench_yolo_decode(bench, yolo_model, rng)
+        bench_face_matching(bench, rng)
+        bench_combine(bench, yolo_classes, rng)
+
+    report = {
+        'environment': {
+            'python': platform.python_version(),
+            'opencv': cv2.__version__,
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'cpus': os.cpu_count()
+        },
+        'frames': args.frames or 'synthetic',
+        'unit': 'ms',
+        'results': bench.results
+    }
+    text = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(text)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+if __name__ == "__main__":
+    main()
@@ -7,9 +7,21 @@ class YOLOConfig:
     INPUT_SOURCE = 0
     MAX_CAMERA_WIDTH = 1280  # Maximum width to process (will resize larger inputs)
     MAX_CAMERA_HEIGHT = 720  # Maximum height to process (will resize larger inputs)
+    CAPTURE_BUFFERS = 4  # Newest captured frames the capture thread keeps valid
+    CAPTURE_TIMEOUT = 2.0  # Seconds to wait for a new frame before treating the camera as failed
+    FRAME_POOL_SIZE = 8  # Free buffers of each frame size kept for reuse between pipeline stages
     
     # Path to the classes file
     CLASSES_FILE = 'src/data/yolo_classes.txt'
+    CLASSES_RELOAD_INTERVAL = 1.0  # Seconds between checks for edits to the classes file
+    
+    # Face gallery encoding cache (rebuilt automatically when images change)
+    FACE_CACHE_DIR = 'training_data/face_cache'
+    
+    # Face matching
+    FACE_MATCH_TOLERANCE = 0.6  # Maximum encoding distance for a match
+    FACE_INDEX_PARTITION_THRESHOLD = 10000  # Galleries this large use a partitioned index
+    FACE_INDEX_NPROBE = 8  # Partitions searched per face in the partitioned index
     
     # Detection parameters
     CONFIDENCE_THRESHOLD = 0.5
@@ -23,6 +35,98 @@ class YOLOConfig:
     FACE_PROCESS_WIDTH = 320  # Smaller for face detection
     FACE_PROCESS_HEIGHT = 240
     
+    # Tiled detection: a coarse whole-frame pass plus overlapping full-resolution
+    # tiles, so small and distant objects survive the downscale to the network input
+    TILED_DETECTION = False
+    TILE_SIZE = 832  # Tile edge in capture pixels
+    TILE_OVERLAP = 0.2  # Fraction of a tile shared with its neighbour
+    TILED_MAX_TILES = 4  # Tiles run per detection pass (bounds the cost)
+    TILE_SMALL_OBJECT = 0.01  # Coarse boxes below this fraction of the frame area get a tile pass
+    TILE_REFINE_CONFIDENCE = 0.7  # ...as do coarse boxes below this confidence
+    TILE_SEAM_MARGIN = 4  # Pixels from an interior tile edge that count as cut off
+    TILE_CONTAINMENT = 0.6  # Cut-off boxes this much inside a same-class box are duplicates
+    
+    # Batched inference (offline processing and multiple cameras)
+    YOLO_BATCH_SIZE = 4  # Frames packed into one forward pass
+    YOLO_BATCH_MAX_WAIT = 0.02  # Seconds a partial batch waits for more frames
+    
     # Performance settings
     TARGET_FPS = 30
-    DETECTION_INTERVAL = 1.0
\ No newline at end of file
+    DETECTION_INTERVAL = 1.0
+    FACE_INTERVAL = 2.0
+    
+    # Adaptive detection cadence: intervals move within these bounds with scene
+    # activity, but never below what keeps each detector within its CPU share
+    ADAPTIVE_DETECTION = True
+    DETECTION_INTERVAL_MIN = 0.25
+    DETECTION_INTERVAL_MAX = 2.0
+    FACE_INTERVAL_MIN = 0.5
+    FACE_INTERVAL_MAX = 4.0
+    DETECTION_CPU_BUDGET = 0.5  # Fraction of one core YOLO may use
+    FACE_CPU_BUDGET = 0.25  # Fraction of one core face recognition may use
+    ACTIVITY_SPEED_SCALE = 0.5  # Box diagonals per second that count as a fully active scene
+    ADAPTIVE_SMOOTHING = 0.8  # Weight of the previous latency/interval estimate
+    
+    # Optionally trade YOLO input resolution for cadence (single camera only, the model is shared)
+    ADAPTIVE_INPUT_SIZE = False
+    ADAPTIVE_INPUT_SIZES = (416, 320, 256)  # Multiples of 32, largest first
+    ADAPTIVE_INPUT_COOLDOWN = 10.0  # Seconds between input size changes
+    
+    # Frame scheduling: share of each frame's budget per stage of the display loop
+    FRAME_BUDGET_SPLIT = {'capture': 0.05, 'inference': 0.15, 'render': 0.5, 'display': 0.3}
+    FRAME_DEGRADE_FRAMES = 15  # Consecutive over-budget frames before degrading a level
+    FRAME_RECOVER_FRAMES = 90  # Consecutive comfortable frames before recovering a level
+    FRAME_RECOVER_RATIO = 0.7  # "Comfortable" means under this fraction of the frame interval
+    DEGRADED_DISPLAY_SCALE = 0.5  # Display render scale at the reduced-resolution level
+    WINDOW_POLL_INTERVAL = 0.5  # Seconds between window size checks
+    
+    # Tracking between detection passes
+    TRACKING_ENABLED = True
+    TRACK_IOU_THRESHOLD = 0.3  # Minimum IoU to match a detection to a track
+    TRACK_CENTROID_GATE = 0.5  # Fallback match if centres are this close (fraction of box size)
+    TRACK_GATE_SPEED = 1.0  # Gate widening per second since a track was seen, in box sizes
+    TRACK_MAX_AGE_INTERVALS = 2.5  # Detection intervals a track survives without a detection
+    TRACK_MAX_PREDICTION_INTERVALS = 1.5  # Detection intervals of motion extrapolation
+    TRACK_VELOCITY_SMOOTHING = 0.5  # Weight of the previous velocity estimate
+    
+    # Face tracking: encode only new, unconfirmed or stale face tracks
+    FACE_TRACK_MAX_AGE = 5.0  # Seconds a face track survives without being located
+    FACE_CONFIRM_DISTANCE = 0.5  # Matches at most this far from the gallery face are confirmed at once
+    FACE_SETTLE_PASSES = 3  # The same result this many passes in a row (including unknown) also confirms
+    FACE_REVERIFY_INTERVAL = 30.0  # Seconds before a confirmed identity (or unknown) is checked again
+    
+    # Restrict face detection to padded YOLO "person" boxes (needs the person class enabled)
+    FACE_PERSON_ROI = False
+    FACE_ROI_PADDING = 0.2  # Fraction of the person box added on each side
+    
+    # Motion gate: skip inference while the (downscaled) scene is unchanged
+    MOTION_GATE_ENABLED = True
+    MOTION_WIDTH = 160  # Width of the grayscale copy used for differencing
+    MOTION_PIXEL_THRESHOLD = 25  # Grey-level change that counts as a changed pixel
+    MOTION_AREA_THRESHOLD = 0.005  # Fraction of changed pixels needed to run inference
+    MOTION_MAX_SKIP = 30.0  # Seconds after which inference runs even on a static scene
+    MOTION_ROIS = False  # Search for faces only in changed regions when no person ROIs apply
+    MOTION_ROI_PADDING = 0.25  # Fraction of each changed region added on each side
+    
+    # Label rendering
+    LABEL_CACHE_SIZE = 256  # Maximum number of cached label sprites
+    LABEL_CONFIDENCE_STEP = 0.05  # Displayed confidences are rounded to this step
+    
+    # Hot-path metrics, served in Prometheus text format at http://METRICS_HOST:METRICS_PORT/metrics
+    METRICS_ENABLED = False
+    METRICS_HOST = '127.0.0.1'
+    METRICS_PORT = 9464
+    METRICS_WINDOW = 1024  # Most recent samples per stage used for percentiles
+    
+    # Recording of the annotated output, encoded in a separate process
+    RECORDING_ENABLED = False  # Start recording on launch (toggle with 'r')
+    RECORDING_DIR = 'recordings'
+    RECORDING_FPS = 30  # Frames per second written; faster display loops are subsampled
+    RECORDING_FOURCC = 'mp4v'
+    RECORDING_EXTENSION = 'mp4'
+    RECORDING_QUEUE_SIZE = 8  # Shared-memory frame slots between the display loop and the encoder
+    RECORDING_POLICY = 'drop'  # 'drop' skips frames when the encoder falls behind, 'block' waits
+    RECORDING_BLOCK_TIMEOUT = 0.1  # Longest wait for a free slot under the 'block' policy
+    RECORDING_SEGMENT_SECONDS = 600  # Start a new file after this long
+    RECORDING_SEGMENT_BYTES = 512 * 1024 * 1024  # ... or once the current file reaches this size
+    RECORDING_STOP_TIMEOUT = 5.0  # Seconds to let the encoder flush queued frames on exit
@@ -0,0 +1,65 @@
+import os
+import time
+import numpy as np
+from config import YOLOConfig
+
+class ClassFilter:
+    """Enabled-class mask compiled from the classes file, reloaded when the file changes"""
+
+    def __init__(self, classes_file=YOLOConfig.CLASSES_FILE,
+                 check_interval=YOLOConfig.CLASSES_RELOAD_INTERVAL):
+        self.classes_file = classes_file
+        self.check_interval = check_interval
+
+        self.names = []
+        self.enabled_mask = np.zeros(0, dtype=bool)
+        self.version = 0  # Bumped on every reload so consumers can rebuild derived state
+
+        self._mtime = None
+        self._last_check = 0
+        self.reload()
+
+    def reload(self):
+        """Read the classes file and compile the enabled-class mask"""
+        self._mtime = os.stat(self.classes_file).st_mtime
+        with open(self.classes_file, 'r') as f:
+            self.names = f.read().strip().split('\n')
+
+        # Lines starting with '#' are disabled
+        self.enabled_mask = np.array(
+            [not name.strip().startswith('#') for name in self.names], dtype=bool
+        )
+        self.version += 1
+        print(f"Loaded {int(self.enabled_mask.sum())}/{len(self.names)} enabled classes")
+
+    def refresh(self, now=None):
+        """Reload if the classes file changed, checking its mtime at most once per interval"""
+        now = time.time() if now is None else now
+        if now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+
+        try:
+            mtime = os.stat(self.classes_file).st_mtime
+        except OSError:
+            return False  # Keep the last good mask while the file is being rewritten
+
+        if mtime == self._mtime:
+            return False
+
+        try:
+            self.reload()
+        except OSError as e:
+            print(f"Failed to reload classes: {str(e)}")
+            return False
+        return True
+
+    def mask_for(self, num_classes):
+        """Return the enabled mask sized to the model's number of classes"""
+        mask = self.enabled_mask
+        if len(mask) == num_classes:
+            return mask
+        resized = np.zeros(num_classes, dtype=bool)
+        count = min(len(mask), num_classes)
+        resized[:count] = mask[:count]
+        return resized
@@ -0,0 +1,81 @@
+import numpy as np
+
+# Which detector produced a row
+SOURCE_YOLO = 0
+SOURCE_FACE = 1
+
+class Detections:
+    """Detection results held as contiguous NumPy columns
+
+    boxes is an (N, 4) int32 array of x, y, w, h; class_ids, confidences,
+    sources and track_ids are length-N columns. Track ID -1 means untracked.
+    Operations return new Detections and never loop over rows in Python.
+    """
+    __slots__ = ('boxes', 'class_ids', 'confidences', 'sources', 'track_ids')
+
+    def __init__(self, boxes, class_ids, confidences, sources, track_ids):
+        self.boxes = boxes
+        self.class_ids = class_ids
+        self.confidences = confidences
+        self.sources = sources
+        self.track_ids = track_ids
+
+    @classmethod
+    def empty(cls):
+        return cls.from_arrays(np.zeros((0, 4)), [], [])
+
+    @classmethod
+    def from_arrays(cls, boxes, class_ids, confidences, track_ids=None, source=SOURCE_YOLO):
+        """Build from array-likes (lists work too); boxes are truncated to whole pixels"""
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4).astype(np.int32)
+        count = len(boxes)
+        if track_ids is None:
+            track_ids = np.full(count, -1, dtype=np.int32)
+        return cls(
+            boxes,
+            np.asarray(class_ids, dtype=np.int32).reshape(count),
+            np.asarray(confidences, dtype=np.float32).reshape(count),
+            np.full(count, source, dtype=np.uint8),
+            np.asarray(track_ids, dtype=np.int32).reshape(count)
+        )
+
+    @classmethod
+    def concat(cls, parts):
+        """Join several Detections into one"""
+        parts = [part for part in parts if len(part)]
+        if not parts:
+            return cls.empty()
+        if len(parts) == 1:
+            return parts[0]
+        return cls(*(np.concatenate([getattr(part, name) for part in parts]) for name in cls.__slots__))
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def __getitem__(self, index):
+        """Select rows with a boolean mask, index array or slice"""
+        return Detections(*(getattr(self, name)[index] for name in self.__slots__))
+
+    def scale(self, x_scale, y_scale):
+        """Boxes multiplied by per-axis factors, truncated like int() per coordinate"""
+        factors = np.array([x_scale, y_scale, x_scale, y_scale])
+        boxes = (self.boxes * factors).astype(np.int32)
+        return Detections(boxes, self.class_ids, self.confidences, self.sources, self.track_ids)
+
+    def shift(self, dx, dy):
+        """Boxes moved by a pixel offset, e.g. from tile to frame coordinates"""
+        boxes = self.boxes + np.array([dx, dy, 0, 0], dtype=np.int32)
+        return Detections(boxes, self.class_ids, self.confidences, self.sources, self.track_ids)
+
+    def with_class_offset(self, offset):
+        """Class IDs moved into a combined class list that starts at offset"""
+        return Detections(self.boxes, self.class_ids + offset, self.confidences, self.sources, self.track_ids)
+
+    def with_track_ids(self, track_ids):
+        return Detections(self.boxes, self.class_ids, self.confidences, self.sources,
+                          np.asarray(track_ids, dtype=np.int32).reshape(len(self)))
+
+    def rows(self):
+        """Plain Python (box, class_id, confidence, track_id) rows, for drawing and serialisation"""
+        return zip(self.boxes.tolist(), self.class_ids.tolist(),
+                   self.confidences.tolist(), self.track_ids.tolist())
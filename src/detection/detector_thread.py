@@ -1,37 +1,160 @@
 import queue
+import cv2
+from config import YOLOConfig
+from detection.tracker import Tracker
+from utils.metrics import metrics
+from utils.frame_pool import frame_pool
+from detection.detections import Detections, SOURCE_FACE
+
+def put_latest(target_queue, item, on_discard=None):
+    """Put an item on a bounded queue, discarding the oldest entry if it is full
+    
+    Discarded entries are passed to on_discard (e.g. to release pooled frames).
+    Returns True if an unread entry had to be discarded.
+    """
+    displaced = False
+    while True:
+        try:
+            target_queue.put_nowait(item)
+            return displaced
+        except queue.Full:
+            try:
+                discarded = target_queue.get_nowait()
+                displaced = True
+                if on_discard:
+                    on_discard(discarded)
+            except queue.Empty:
+                pass
 
 class FaceDetectorThread:
-    def __init__(self, face_model, input_queue, result_queue, running_flag):
+    def __init__(self, face_model, input_queue, result_queue, stop_event):
         self.face_model = face_model
         self.input_queue = input_queue
         self.result_queue = result_queue
-        self.running_flag = running_flag
-    
+        self.stop_event = stop_event
+        
+        # Faces are tracked so identities can be reused instead of re-encoded
+        self.tracker = Tracker(max_age=YOLOConfig.FACE_TRACK_MAX_AGE)
+        self.identities = {}  # track_id -> (class_id, confidence, verified_time, repeats)
+        # Confirmation is set as a gallery distance, checked through the confidence match_faces reports
+        self.confirm_confidence = face_model.distance_confidence(YOLOConfig.FACE_CONFIRM_DISTANCE)
+        self.faces_encoded = 0
+        self.faces_reused = 0
+
     def run(self):
         """Worker function that runs in a thread for face detection"""
         print("Face detection thread started")
-        while self.running_flag:
+        while not self.stop_event.is_set():
             try:
-                # Try to get a frame with a short timeout
+                # Try to get a (timestamp, frame, rois) item with a short timeout
                 try:
-                    frame = self.input_queue.get(timeout=0.1)
+                    timestamp, frame, rois = self.input_queue.get(timeout=0.1)
                 except queue.Empty:
                     continue
                 
-                # Process the frame for face detection
+                # Process the frame for face detection, then hand its buffer back to the pool
                 try:
-                    face_results = self.face_model.detect_objects(frame)
+                    face_results = self.process(frame.array, timestamp, rois)
                     
-                    # Put results in the output queue, but don't block
-                    if not self.result_queue.full():
-                        self.result_queue.put(face_results)
+                    # Put results in the output queue, replacing any unread ones
+                    if put_latest(self.result_queue, face_results):
+                        metrics.inc('queue_full', queue='face_result_queue')
                         
-                    face_boxes = face_results[0]
-                    if face_boxes:
-                        print(f"Thread detected {len(face_boxes)} faces")
+                    if len(face_results):
+                        print(f"Thread detected {len(face_results)} faces "
+                              f"(encoded {self.faces_encoded}, reused {self.faces_reused} so far)")
                 except Exception as e:
                     print(f"Face thread error: {str(e)}")
+                finally:
+                    frame.release()
             except Exception as e:
                 print(f"Face thread general error: {str(e)}")
                 
-        print("Face detection thread ended")
\ No newline at end of file
+        print("Face detection thread ended")
+
+    def process(self, frame, timestamp, rois=None):
+        """Locate faces (optionally only inside rois), and encode only those on new, unconfirmed or stale tracks"""
+        if frame is None or frame.size == 0 or len(frame.shape) != 3:
+            return Detections.empty()
+        rgb = frame_pool.acquire(frame.shape, frame.dtype)
+        try:
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb.array)
+            return self.process_rgb(rgb_frame, timestamp, rois)
+        finally:
+            rgb.release()
+    
+    def process_rgb(self, rgb_frame, timestamp, rois=None):
+        """Face tracking and identification on an RGB frame"""
+        face_locations = self.face_model.locate_faces(rgb_frame, rois)
+        boxes = self.face_model.boxes_from_locations(face_locations)
+        track_ids = self.tracker.update(boxes, [0] * len(boxes), [1.0] * len(boxes), timestamp)
+        
+        # Only run the expensive encoding and gallery match where it is needed
+        pending = [i for i, track_id in enumerate(track_ids)
+                   if self.needs_identification(track_id, timestamp)]
+        if pending:
+            class_ids, confidences = self.face_model.identify_faces(
+                rgb_frame, [face_locations[i] for i in pending]
+            )
+            for i, class_id, confidence in zip(pending, class_ids, confidences):
+                # Count how many passes in a row gave this track the same answer
+                previous = self.identities.get(track_ids[i])
+                repeats = previous[3] + 1 if previous and previous[0] == class_id else 1
+                self.identities[track_ids[i]] = (class_id, confidence, timestamp, repeats)
+        self.faces_encoded += len(pending)
+        self.faces_reused += len(track_ids) - len(pending)
+        
+        # Forget identities of tracks the tracker has dropped
+        live = {track.track_id for track in self.tracker.tracks}
+        self.identities = {k: v for k, v in self.identities.items() if k in live}
+        
+        class_ids = [self.identities[track_id][0] for track_id in track_ids]
+        confidences = [self.identities[track_id][1] for track_id in track_ids]
+        return Detections.from_arrays(boxes, class_ids, confidences, track_ids, source=SOURCE_FACE)
+
+    def needs_identification(self, track_id, timestamp):
+        """True for new tracks, unconfirmed results and confirmed ones due for re-verification
+
+        A result is confirmed by a close gallery match, or by coming back the
+        same FACE_SETTLE_PASSES times in a row, so strangers ("unknown") and
+        weaker genuine matches are not re-encoded on every pass either.
+        """
+        identity = self.identities.get(track_id)
+        if identity is None:
+            return True
+        class_id, confidence, verified_time, repeats = identity
+        confirmed = ((class_id >= 0 and confidence >= self.confirm_confidence) or
+                     repeats >= YOLOConfig.FACE_SETTLE_PASSES)
+        if not confirmed:
+            return True
+        return timestamp - verified_time >= YOLOConfig.FACE_REVERIFY_INTERVAL
+
+class YOLODetectorThread:
+    def __init__(self, yolo_model, input_queue, result_queue, stop_event):
+        self.yolo_model = yolo_model
+        self.input_queue = input_queue
+        self.result_queue = result_queue
+        self.stop_event = stop_event
+
+    def run(self):
+        """Worker function that runs in a thread for YOLO object detection"""
+        print("YOLO detection thread started")
+        while not self.stop_event.is_set():
+            # Frames arrive as (timestamp, pooled frame, result scale); only the newest one is ever queued
+            try:
+                timestamp, frame, result_scale = self.input_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            try:
+                yolo_results = self.yolo_model.detect(frame.array)
+
+                # Tag results with the timestamp and display scale of the frame they came from
+                put_latest(self.result_queue, (timestamp, yolo_results, result_scale))
+            except Exception as e:
+                print(f"YOLO thread error: {str(e)}")
+            finally:
+                # Hand the buffer back to the pool for the next submission
+                frame.release()
+
+        print("YOLO detection thread ended")
@@ -0,0 +1,125 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+class FaceEncodingCache:
+    """On-disk cache of gallery face encodings keyed by path, size, mtime and content hash"""
+
+    INDEX_FILE = 'index.json'
+    ENCODINGS_FILE = 'encodings.npy'
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, self.INDEX_FILE)
+        self.encodings_path = os.path.join(cache_dir, self.ENCODINGS_FILE)
+
+        self._entries = {}  # path -> {'size', 'mtime', 'sha1'}
+        self._encodings = {}  # path -> encoding, or None if the image has no face
+        self._dirty = False
+
+    def load(self):
+        """Load the index and memory-map the stored encodings"""
+        if not (os.path.exists(self.index_path) and os.path.exists(self.encodings_path)):
+            return
+
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+            encodings = np.load(self.encodings_path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable face cache: {str(e)}")
+            return
+
+        for path, entry in index.items():
+            row = entry.pop('row')
+            if row >= len(encodings):
+                self._dirty = True
+                continue
+            self._entries[path] = entry
+            self._encodings[path] = np.array(encodings[row]) if row >= 0 else None
+        print(f"Face cache: {len(self._entries)} entries loaded from {self.cache_dir}")
+
+    def get(self, path):
+        """Return (encoding, hit) for an image, validating size, mtime and content hash"""
+        entry = self._entries.get(path)
+        if entry is None:
+            return None, False
+
+        stat = os.stat(path)
+        if entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+            return self._encodings[path], True
+
+        # Touched but possibly unchanged: only then pay for hashing the file
+        if entry['size'] == stat.st_size and entry['sha1'] == self._hash_file(path):
+            entry['mtime'] = stat.st_mtime
+            self._dirty = True
+            return self._encodings[path], True
+
+        return None, False
+
+    def put(self, path, encoding):
+        """Store the encoding for an image (None records that it has no face)"""
+        stat = os.stat(path)
+        self._entries[path] = {
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+            'sha1': self._hash_file(path)
+        }
+        self._encodings[path] = encoding
+        self._dirty = True
+
+    def evict_missing(self, paths, folder):
+        """Drop entries for images in folder that are no longer in the gallery
+
+        The cache is shared by every gallery folder, so entries from other
+        folders are kept for the next run that loads them.
+        """
+        keep = set(paths)
+        folder = os.path.abspath(folder)
+        missing = [p for p in self._entries
+                   if p not in keep and os.path.dirname(os.path.abspath(p)) == folder]
+        for path in missing:
+            del self._entries[path]
+            del self._encodings[path]
+            self._dirty = True
+            print(f"Evicted cached face: {path}")
+
+    def save(self):
+        """Write the index and encodings back to disk if anything changed"""
+        if not self._dirty:
+            return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        index = {}
+        rows = []
+        for path, entry in self._entries.items():
+            encoding = self._encodings[path]
+            row = -1
+            if encoding is not None:
+                row = len(rows)
+                rows.append(encoding)
+            index[path] = dict(entry, row=row)
+
+        encodings = np.array(rows, dtype=np.float64) if rows else np.zeros((0, 128))
+
+        # Write to temporary files first so a crash never leaves a half-written cache
+        tmp_encodings = self.encodings_path + '.tmp.npy'
+        tmp_index = self.index_path + '.tmp'
+        np.save(tmp_encodings, encodings)
+        with open(tmp_index, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp_encodings, self.encodings_path)
+        os.replace(tmp_index, self.index_path)
+
+        self._dirty = False
+        print(f"Face cache: saved {len(rows)} encodings to {self.cache_dir}")
+
+    def _hash_file(self, path):
+        """SHA-1 of the file contents"""
+        sha1 = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                sha1.update(chunk)
+        return sha1.hexdigest()
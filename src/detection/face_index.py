@@ -0,0 +1,95 @@
+import numpy as np
+from config import YOLOConfig
+
+class FaceIndex:
+    """Nearest-neighbour search over known face encodings held in one float32 matrix"""
+
+    def __init__(self, encodings,
+                 partition_threshold=YOLOConfig.FACE_INDEX_PARTITION_THRESHOLD,
+                 nprobe=YOLOConfig.FACE_INDEX_NPROBE):
+        encodings = np.asarray(encodings, dtype=np.float32)
+        if encodings.ndim != 2:
+            encodings = encodings.reshape(-1, 128)  # face_recognition encodings are 128-d
+        self.encodings = np.ascontiguousarray(encodings)
+        self.sq_norms = np.einsum('ij,ij->i', self.encodings, self.encodings)
+        self.nprobe = nprobe
+
+        # Large galleries get an inverted-file partition so queries only scan a few cells
+        self.centroids = None
+        if len(self.encodings) >= partition_threshold:
+            self._build_partitions()
+
+    def __len__(self):
+        return len(self.encodings)
+
+    def search(self, queries):
+        """Return (indices, distances) of the nearest known encoding for each query row"""
+        queries = np.asarray(queries, dtype=np.float32)
+        if queries.ndim == 1 and queries.size:
+            queries = queries[None, :]
+        if len(queries) == 0 or len(self) == 0:
+            return np.full(len(queries), -1, dtype=np.int64), np.full(len(queries), np.inf, dtype=np.float32)
+
+        if self.centroids is None:
+            distances = self._distances(queries, self.encodings, self.sq_norms)
+            indices = np.argmin(distances, axis=1)
+            return indices, distances[np.arange(len(queries)), indices]
+
+        return self._search_partitions(queries)
+
+    def _distances(self, queries, encodings, sq_norms):
+        """Euclidean distances between every query and every encoding as one matrix product"""
+        query_norms = np.einsum('ij,ij->i', queries, queries)
+        d2 = query_norms[:, None] + sq_norms[None, :] - 2.0 * (queries @ encodings.T)
+        return np.sqrt(np.maximum(d2, 0.0))
+
+    def _build_partitions(self, iterations=10, seed=0):
+        """Cluster the gallery with k-means and sort rows by cell"""
+        count = len(self.encodings)
+        num_cells = max(1, int(np.sqrt(count)))
+        rng = np.random.default_rng(seed)
+        centroids = self.encodings[rng.choice(count, num_cells, replace=False)].copy()
+
+        for _ in range(iterations):
+            centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+            assignment = np.argmin(self._distances(self.encodings, centroids, centroid_norms), axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, self.encodings)
+            counts = np.bincount(assignment, minlength=num_cells)
+            filled = counts > 0
+            centroids[filled] = sums[filled] / counts[filled, None]
+
+        centroid_norms = np.einsum('ij,ij->i', centroids, centroids)
+        assignment = np.argmin(self._distances(self.encodings, centroids, centroid_norms), axis=1)
+
+        # Store rows contiguously per cell, remembering their original gallery index
+        order = np.argsort(assignment, kind='stable')
+        self.order = order
+        self.partitioned = self.encodings[order]
+        self.partitioned_norms = self.sq_norms[order]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=num_cells))])
+        self.centroids = centroids
+        self.centroid_norms = centroid_norms
+        print(f"Face index: {count} encodings in {num_cells} partitions")
+
+    def _search_partitions(self, queries):
+        """Search only the nprobe cells closest to each query"""
+        nprobe = min(self.nprobe, len(self.centroids))
+        cell_distances = self._distances(queries, self.centroids, self.centroid_norms)
+        probes = np.argpartition(cell_distances, nprobe - 1, axis=1)[:, :nprobe]
+
+        indices = np.empty(len(queries), dtype=np.int64)
+        distances = np.empty(len(queries), dtype=np.float32)
+        for i, cells in enumerate(probes):
+            rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in cells])
+            if len(rows) == 0:
+                indices[i] = -1
+                distances[i] = np.inf
+                continue
+            candidate_distances = self._distances(
+                queries[i:i + 1], self.partitioned[rows], self.partitioned_norms[rows]
+            )[0]
+            best = np.argmin(candidate_distances)
+            indices[i] = self.order[rows[best]]
+            distances[i] = candidate_distances[best]
+        return indices, distances
@@ -4,109 +4,163 @@ import os
 import glob
 import numpy as np
 from PIL import Image
+from config import YOLOConfig
+from detection.face_cache import FaceEncodingCache
+from detection.face_index import FaceIndex
+from detection.detections import Detections, SOURCE_FACE
+from utils.metrics import metrics
 
 class FaceModel:
     def __init__(self):
         self.known_face_encodings = []
         self.known_face_names = []
+        self.face_index = FaceIndex(self.known_face_encodings)
         
-    def load_faces(self, faces_dir="training_data/faces"):
-        """Load all image files directly from faces directory"""
+    def load_faces(self, faces_dir="training_data/faces", cache_dir=YOLOConfig.FACE_CACHE_DIR):
+        """Load all image files directly from faces directory, reusing cached encodings"""
         if not os.path.exists(faces_dir):
             os.makedirs(faces_dir)
             print(f"Created faces directory at {faces_dir}")
             return
 
-        image_files = glob.glob(os.path.join(faces_dir, "*.[jp][pn][g]"))
+        image_files = sorted(glob.glob(os.path.join(faces_dir, "*.[jp][pn][g]")))
+        
+        self.known_face_encodings = list(self.known_face_encodings)
+        cache = FaceEncodingCache(cache_dir)
+        cache.load()
+        encoded = 0
         
         for image_path in image_files:
             try:
                 # Use filename without extension as person's name
                 name = os.path.splitext(os.path.basename(image_path))[0]
                 
-                # Load image using PIL first to ensure correct format
-                image = Image.open(image_path)
-                # Convert to RGB if needed
-                if image.mode != 'RGB':
-                    image = image.convert('RGB')
-                # Convert to numpy array
-                image_np = np.array(image)
+                # Only new or changed images go through face detection
+                face_encoding, hit = cache.get(image_path)
+                if not hit:
+                    face_encoding = self.encode_image(image_path)
+                    cache.put(image_path, face_encoding)
+                    encoded += 1
                 
-                # Detect faces in the image
-                face_locations = face_recognition.face_locations(image_np)
-                if not face_locations:
+                if face_encoding is None:
                     print(f"No face found in {image_path}")
                     continue
                 
-                # Get face encoding for the first face found
-                face_encoding = face_recognition.face_encodings(
-                    image_np,
-                    known_face_locations=[face_locations[0]]
-                )[0]
-                
                 self.known_face_encodings.append(face_encoding)
                 self.known_face_names.append(name)
                 print(f"Loaded face: {name}")
                 
             except Exception as e:
                 print(f"Error loading {image_path}: {str(e)}")
+        
+        # Forget images that were removed from the gallery and persist any changes
+        cache.evict_missing(image_files, faces_dir)
+        try:
+            cache.save()
+        except OSError as e:
+            print(f"Failed to save face cache: {str(e)}")
+        print(f"Encoded {encoded} of {len(image_files)} gallery images")
+        
+        # Hold the gallery as one contiguous float32 matrix for batched matching
+        self.face_index = FaceIndex(self.known_face_encodings)
+        self.known_face_encodings = self.face_index.encodings
+    
+    def encode_image(self, image_path):
+        """Compute the encoding of the first face in an image file, or None if there is none"""
+        # Load image using PIL first to ensure correct format
+        image = Image.open(image_path)
+        # Convert to RGB if needed
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        # Convert to numpy array
+        image_np = np.array(image)
+        
+        # Detect faces in the image
+        face_locations = face_recognition.face_locations(image_np)
+        if not face_locations:
+            return None
+        
+        # Get face encoding for the first face found
+        return face_recognition.face_encodings(
+            image_np,
+            known_face_locations=[face_locations[0]]
+        )[0]
     
     def detect_objects(self, frame):
-        """Detect and identify faces in frame"""
+        """Detect and identify faces in frame, returning face Detections"""
         if frame is None or frame.size == 0:
-            return [], [], []
+            return Detections.empty()
             
         try:
             # Ensure frame is in RGB
             if len(frame.shape) == 3:
                 rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
             else:
-                return [], [], []
+                return Detections.empty()
             
             # Find face locations
-            face_locations = face_recognition.face_locations(rgb_frame)
+            face_locations = self.locate_faces(rgb_frame)
             if not face_locations:
-                return [], [], []
+                return Detections.empty()
+            
+            class_ids, confidences = self.identify_faces(rgb_frame, face_locations)
+            return Detections.from_arrays(self.boxes_from_locations(face_locations), class_ids, confidences,
+                                          source=SOURCE_FACE)
+            
+        except Exception as e:
+            print(f"Error in detect_objects: {str(e)}")
+            return Detections.empty()
+    
+    @staticmethod
+    def boxes_from_locations(face_locations):
+        """(top, right, bottom, left) face locations as an (N, 4) array of x, y, w, h boxes"""
+        locations = np.asarray(face_locations, dtype=np.int32).reshape(-1, 4)
+        top, right, bottom, left = locations.T
+        return np.stack([left, top, right - left, bottom - top], axis=1)
+    
+    def locate_faces(self, rgb_frame, rois=None):
+        """Find face locations as (top, right, bottom, left) tuples
+        
+        If rois is given, only those (x, y, w, h) regions are searched and the
+        locations are mapped back to frame coordinates.
+        """
+        with metrics.span('face_locate'):
+            if rois is None:
+                return face_recognition.face_locations(rgb_frame)
             
-            # Get face encodings
+            face_locations = []
+            for x, y, w, h in rois:
+                crop = rgb_frame[y:y + h, x:x + w]
+                if crop.size == 0:
+                    continue
+                for top, right, bottom, left in face_recognition.face_locations(crop):
+                    face_locations.append((top + y, right + x, bottom + y, left + x))
+            return face_locations
+    
+    def identify_faces(self, rgb_frame, face_locations):
+        """Encode the faces at the given locations and match them against the gallery"""
+        if not face_locations:
+            return [], []
+        with metrics.span('face_encode'):
             face_encodings = face_recognition.face_encodings(
                 rgb_frame,
                 face_locations
             )
-            
-            boxes = []
-            class_ids = []
-            confidences = []
-            
-            for (top, right, bottom, left), face_encoding in zip(face_locations, face_encodings):
-                # Create bounding box
-                boxes.append([
-                    left,
-                    top,
-                    right - left,
-                    bottom - top
-                ])
-                
-                if len(self.known_face_encodings) > 0:
-                    # Compare with known faces
-                    matches = face_recognition.compare_faces(
-                        self.known_face_encodings,
-                        face_encoding,
-                        tolerance=0.6
-                    )
-                    
-                    if True in matches:
-                        class_ids.append(matches.index(True))
-                        confidences.append(0.99)
-                    else:
-                        class_ids.append(-1)
-                        confidences.append(0.5)
-                else:
-                    class_ids.append(-1)
-                    confidences.append(0.5)
-            
-            return boxes, class_ids, confidences
-            
-        except Exception as e:
-            print(f"Error in detect_objects: {str(e)}")
-            return [], [], []
\ No newline at end of file
+        with metrics.span('face_match'):
+            return self.match_faces(face_encodings)
+    
+    @staticmethod
+    def distance_confidence(distance, tolerance=YOLOConfig.FACE_MATCH_TOLERANCE):
+        """Map encoding distance to confidence: 1.0 at distance 0, 0.5 at the tolerance"""
+        return 1.0 - 0.5 * distance / tolerance
+    
+    def match_faces(self, face_encodings, tolerance=YOLOConfig.FACE_MATCH_TOLERANCE):
+        """Match every face encoding against the gallery in one batched distance computation"""
+        if len(self.face_index) == 0:
+            return [-1] * len(face_encodings), [0.5] * len(face_encodings)
+        
+        indices, distances = self.face_index.search(face_encodings)
+        
+        confidences = np.clip(self.distance_confidence(distances, tolerance), 0.0, 1.0)
+        class_ids = np.where(distances <= tolerance, indices, -1)
+        return class_ids.tolist(), confidences.astype(float).tolist()
@@ -0,0 +1,89 @@
+import time
+import queue
+import threading
+from concurrent.futures import Future
+from config import YOLOConfig
+
+class MicroBatcher:
+    """Collects frames from several producers and runs them through YOLOModel.detect_batch together"""
+
+    def __init__(self, yolo_model, batch_size=YOLOConfig.YOLO_BATCH_SIZE,
+                 max_wait=YOLOConfig.YOLO_BATCH_MAX_WAIT):
+        self.yolo_model = yolo_model
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+
+        self._requests = queue.Queue()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self.batches_run = 0
+        self.frames_run = 0
+
+    def start(self):
+        """Start the batching thread"""
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the batching thread"""
+        self._stop_event.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+
+    def submit(self, frame):
+        """Queue a frame and return a Future for its Detections"""
+        future = Future()
+        self._requests.put((frame, future))
+        return future
+
+    def detect(self, frame):
+        """Detect objects in one frame, blocking until its batch has run"""
+        return self.submit(frame).result()
+
+    def _collect(self):
+        """Wait for a first request, then gather more until the batch is full or max_wait passes"""
+        try:
+            batch = [self._requests.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        """Batching loop"""
+        while not self._stop_event.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+
+            frames = [frame for frame, _ in batch]
+            try:
+                results = self.yolo_model.detect_batch(frames, batch_size=self.batch_size)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+            self.batches_run += 1
+            self.frames_run += len(batch)
+
+        # Fail anything still waiting so producers do not hang on shutdown
+        while True:
+            try:
+                _, future = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            future.set_exception(RuntimeError("Micro-batcher stopped"))
@@ -1,11 +1,25 @@
+import time
 import cv2
 import numpy as np
 from config import YOLOConfig
+from detection.class_filter import ClassFilter
+from detection.detections import Detections
+from detection.tiling import make_tiles, select_tiles, merge_detections
+from utils.metrics import metrics
+from utils.frame_pool import frame_pool
 
 class YOLOModel:
     def __init__(self):
         self.net = None
         self.output_layers = None
+        self.last_decode_time = 0.0
+        self.input_size = (YOLOConfig.INPUT_WIDTH, YOLOConfig.INPUT_HEIGHT)  # Network input, may be tuned at runtime
+        
+        # Enabled classes are compiled once and shared with DetectionManager
+        self.class_filter = ClassFilter()
+        
+        # Round-robin position of the tiled mode's coverage scan
+        self.tile_cursor = 0
         
     def load_model(self, weights_path, config_path):
         try:
@@ -27,25 +41,177 @@ class YOLOModel:
         except Exception as e:
             raise RuntimeError(f"Failed to load model: {str(e)}")
         
+    def detect_scaled(self, frame):
+        """Run detection at the YOLO processing resolution and scale boxes back to the frame"""
+        h, w = frame.shape[:2]
+        if w == YOLOConfig.YOLO_PROCESS_WIDTH and h == YOLOConfig.YOLO_PROCESS_HEIGHT:
+            return self.detect_objects(frame)
+        
+        # Resize into a pooled buffer rather than a fresh array every pass
+        yolo_frame = frame_pool.acquire(
+            (YOLOConfig.YOLO_PROCESS_HEIGHT, YOLOConfig.YOLO_PROCESS_WIDTH) + frame.shape[2:], frame.dtype
+        )
+        try:
+            with metrics.span('yolo_resize'):
+                cv2.resize(frame, (YOLOConfig.YOLO_PROCESS_WIDTH, YOLOConfig.YOLO_PROCESS_HEIGHT),
+                           dst=yolo_frame.array)
+            detections = self.detect_objects(yolo_frame.array)
+        finally:
+            yolo_frame.release()
+        
+        return detections.scale(w / YOLOConfig.YOLO_PROCESS_WIDTH, h / YOLOConfig.YOLO_PROCESS_HEIGHT)
+        
+    def detect(self, frame):
+        """Detect objects with the configured strategy, tiled or whole-frame"""
+        if YOLOConfig.TILED_DETECTION:
+            return self.detect_tiled(frame)
+        return self.detect_scaled(frame)
+    
+    def detect_tiled(self, frame):
+        """Coarse pass over the whole frame plus full-resolution passes over selected tiles
+        
+        At most TILED_MAX_TILES tiles run per call, as one batch, so the cost is
+        bounded regardless of the frame size. Boxes are in frame coordinates.
+        """
+        height, width = frame.shape[:2]
+        coarse = self.detect_scaled(frame)
+        
+        tiles = make_tiles(width, height)
+        if len(tiles) == 1 and tiles[0][2] == width and tiles[0][3] == height:
+            return coarse  # The frame is no bigger than one tile
+        
+        chosen, self.tile_cursor = select_tiles(tiles, coarse.boxes, coarse.confidences,
+                                                width, height, self.tile_cursor)
+        crops = [frame[y:y + h, x:x + w] for x, y, w, h in (tiles[i] for i in chosen)]
+        
+        parts = [coarse]
+        for index, tile_detections in zip(chosen, self.detect_batch(crops)):
+            parts.append(tile_detections.shift(*tiles[index][:2]))
+        
+        with metrics.span('tile_merge'):
+            return merge_detections(Detections.concat(parts), [tiles[i] for i in chosen], width, height)
+        
     def detect_objects(self, frame):
         height, width = frame.shape[:2]
         
-        # Load enabled classes
-        with open(YOLOConfig.CLASSES_FILE, 'r') as f:
-            enabled_classes = [i for i, line in enumerate(f.readlines()) 
-                             if not line.strip().startswith('#')]
+        # Pick up live edits to the classes file (stat is throttled inside the filter)
+        self.class_filter.refresh()
         
         blob = cv2.dnn.blobFromImage(
             frame, 
             1/255.0, 
-            (YOLOConfig.INPUT_WIDTH, YOLOConfig.INPUT_HEIGHT), 
+            self.input_size, 
             swapRB=True, 
             crop=False
         )
         self.net.setInput(blob)
         
-        outputs = self.net.forward(self.output_layers)
+        with metrics.span('yolo_forward'):
+            outputs = self.net.forward(self.output_layers)
+        
+        # Decode all candidate rows at once and record how long it took
+        decode_start = time.perf_counter()
+        boxes, class_ids, confidences = self.decode_outputs(outputs, width, height)
+        self.last_decode_time = time.perf_counter() - decode_start
+        metrics.observe('yolo_decode', self.last_decode_time)
+
+        with metrics.span('yolo_nms'):
+            return self.apply_nms(boxes, class_ids, confidences)
+
+    def detect_batch(self, frames, batch_size=YOLOConfig.YOLO_BATCH_SIZE):
+        """Detect objects in several frames, packing up to batch_size frames per forward pass
+        
+        Frames may differ in size; boxes are scaled to each frame's own dimensions.
+        Returns a list of Detections, one per frame.
+        """
+        self.class_filter.refresh()
         
+        results = []
+        for start in range(0, len(frames), batch_size):
+            chunk = frames[start:start + batch_size]
+            blob = cv2.dnn.blobFromImages(
+                chunk,
+                1/255.0,
+                self.input_size,
+                swapRB=True,
+                crop=False
+            )
+            self.net.setInput(blob)
+            with metrics.span('yolo_forward'):
+                outputs = self.net.forward(self.output_layers)
+            
+            # Region layers return (rows, values) for one image and (N, rows, values) for a batch
+            per_frame = [output.reshape(len(chunk), -1, output.shape[-1]) for output in outputs]
+            
+            for i, frame in enumerate(chunk):
+                height, width = frame.shape[:2]
+                decode_start = time.perf_counter()
+                boxes, class_ids, confidences = self.decode_outputs(
+                    [output[i] for output in per_frame], width, height
+                )
+                self.last_decode_time = time.perf_counter() - decode_start
+                metrics.observe('yolo_decode', self.last_decode_time)
+                with metrics.span('yolo_nms'):
+                    results.append(self.apply_nms(boxes, class_ids, confidences))
+        return results
+
+    def apply_nms(self, boxes, class_ids, confidences):
+        """Filter decoded detections with non-maximum suppression into a Detections"""
+        detections = Detections.from_arrays(boxes, class_ids, confidences)
+        if not len(detections):  # Only if we have detections
+            return detections
+        
+        # The box and confidence columns go to NMSBoxes as arrays, no per-row Python lists
+        indices = cv2.dnn.NMSBoxes(
+            detections.boxes, 
+            detections.confidences, 
+            YOLOConfig.CONFIDENCE_THRESHOLD, 
+            YOLOConfig.NMS_THRESHOLD
+        )
+        
+        # Older OpenCV versions return an (N, 1) array
+        indices = np.array(indices, dtype=np.int64).flatten()
+        
+        # Filter results based on NMS
+        return detections[indices]
+
+    def decode_outputs(self, outputs, width, height):
+        """Decode raw YOLO output layers into xywh boxes with NumPy array operations
+        
+        Returns an (N, 4) int32 box array with matching class ID and confidence arrays.
+        """
+        detections = np.concatenate(
+            [output.reshape(-1, output.shape[-1]) for output in outputs]
+        )
+        if len(detections) == 0:
+            return np.zeros((0, 4), dtype=np.int32), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        
+        # Best class and its score for every candidate row
+        scores = detections[:, 5:]
+        class_ids = np.argmax(scores, axis=1)
+        confidences = scores[np.arange(len(scores)), class_ids]
+        
+        # Only keep rows whose class is enabled and confidence is high enough
+        enabled_mask = self.class_filter.mask_for(scores.shape[1])
+        keep = (confidences > YOLOConfig.CONFIDENCE_THRESHOLD) & enabled_mask[class_ids]
+        
+        detections = detections[keep]
+        class_ids = class_ids[keep]
+        confidences = confidences[keep]
+        
+        # Convert to pixel xywh, truncating like int() did in the per-row loop
+        center_x = (detections[:, 0] * width).astype(np.int32)
+        center_y = (detections[:, 1] * height).astype(np.int32)
+        w = (detections[:, 2] * width).astype(np.int32)
+        h = (detections[:, 3] * height).astype(np.int32)
+        x = (center_x - w / 2).astype(np.int32)
+        y = (center_y - h / 2).astype(np.int32)
+        
+        return np.stack([x, y, w, h], axis=1), class_ids, confidences
+
+    def decode_outputs_loop(self, outputs, width, height):
+        """Reference per-row decode into Python lists, kept for timing comparisons against decode_outputs"""
+        enabled_classes = np.flatnonzero(self.class_filter.enabled_mask).tolist()
         boxes = []
         confidences = []
         class_ids = []
@@ -70,23 +236,5 @@ class YOLOModel:
                     boxes.append([x, y, w, h])
                     confidences.append(float(confidence))
                     class_ids.append(class_id)
-
-        # Apply NMS
-        if boxes:  # Only if we have detections
-            indices = cv2.dnn.NMSBoxes(
-                boxes, 
-                confidences, 
-                YOLOConfig.CONFIDENCE_THRESHOLD, 
-                YOLOConfig.NMS_THRESHOLD
-            )
-            
-            # Filter results based on NMS
-            filtered_boxes = [boxes[i] for i in indices]
-            filtered_class_ids = [class_ids[i] for i in indices]
-            filtered_confidences = [confidences[i] for i in indices]
-        else:
-            filtered_boxes = []
-            filtered_class_ids = []
-            filtered_confidences = []
-        
-        return filtered_boxes, filtered_class_ids, filtered_confidences
\ No newline at end of file
+        
+        return boxes, class_ids, confidences
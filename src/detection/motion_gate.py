@@ -0,0 +1,122 @@
+import cv2
+import numpy as np
+from config import YOLOConfig
+from utils.roi import pad_box, merge_boxes
+from utils.metrics import metrics
+
+class MotionGate:
+    """Skips inference on frames that have not changed since a detector last ran
+
+    Each frame is reduced once to a small blurred grayscale copy. Every detector
+    (keyed by name) keeps the copy from its last executed pass as a reference,
+    and a new pass only runs when enough pixels differ from it, or when
+    MOTION_MAX_SKIP seconds have passed so stationary newcomers are still found.
+    """
+
+    def __init__(self, width=YOLOConfig.MOTION_WIDTH,
+                 pixel_threshold=YOLOConfig.MOTION_PIXEL_THRESHOLD,
+                 area_threshold=YOLOConfig.MOTION_AREA_THRESHOLD,
+                 max_skip=YOLOConfig.MOTION_MAX_SKIP):
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.area_threshold = area_threshold
+        self.max_skip = max_skip
+
+        # Reused buffers for the downscaled copy and the difference mask
+        self._small = None
+        self._gray = None
+        self._diff = None
+        self._mask = None
+        self._prepared_time = None
+        self._frame_size = None
+
+        self.references = {}  # detector -> small grayscale frame at its last pass
+        self.last_run = {}  # detector -> timestamp of its last pass
+        self.executed = {}
+        self.skipped = {}
+        self.changed_fraction = 0.0
+
+    def check(self, detector, frame, timestamp):
+        """Decide whether detector should run on this frame
+
+        Returns (run, rois). rois are the changed regions in frame coordinates when
+        MOTION_ROIS is enabled and only part of the frame changed, otherwise None.
+        """
+        gray = self._prepare(frame, timestamp)
+        reference = self.references.get(detector)
+
+        rois = None
+        if reference is None or reference.shape != gray.shape:
+            run = True
+        else:
+            mask = self._changed_mask(gray, reference)
+            self.changed_fraction = cv2.countNonZero(mask) / mask.size
+            run = (self.changed_fraction >= self.area_threshold or
+                   timestamp - self.last_run.get(detector, 0) >= self.max_skip)
+            if run and YOLOConfig.MOTION_ROIS and self.changed_fraction >= self.area_threshold:
+                rois = self._changed_regions(mask)
+
+        if run:
+            if reference is None or reference.shape != gray.shape:
+                self.references[detector] = gray.copy()
+            else:
+                np.copyto(reference, gray)
+            self.last_run[detector] = timestamp
+            self.executed[detector] = self.executed.get(detector, 0) + 1
+            metrics.inc('motion_gate', detector=detector, result='executed')
+        else:
+            self.skipped[detector] = self.skipped.get(detector, 0) + 1
+            metrics.inc('motion_gate', detector=detector, result='skipped')
+        return run, rois
+
+    def reset(self, detector=None):
+        """Forget references so the next check always runs"""
+        if detector is None:
+            self.references.clear()
+        else:
+            self.references.pop(detector, None)
+
+    def _prepare(self, frame, timestamp):
+        """Downscaled, blurred grayscale copy of the frame, computed once per frame"""
+        if timestamp == self._prepared_time and self._gray is not None:
+            return self._gray
+
+        height, width = frame.shape[:2]
+        size = (self.width, max(1, round(height * self.width / width)))
+        if self._small is None or self._small.shape[:2] != (size[1], size[0]):
+            # New frame size, so every working buffer is reallocated
+            self._small = self._gray = self._diff = self._mask = None
+        self._frame_size = (width, height)
+
+        self._small = cv2.resize(frame, size, dst=self._small, interpolation=cv2.INTER_AREA)
+        self._gray = cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        # Blur in place to suppress sensor noise before differencing
+        cv2.GaussianBlur(self._gray, (5, 5), 0, dst=self._gray)
+        self._prepared_time = timestamp
+        return self._gray
+
+    def _changed_mask(self, gray, reference):
+        """Binary mask of pixels that differ from the reference by more than pixel_threshold"""
+        self._diff = cv2.absdiff(gray, reference, dst=self._diff)
+        _, self._mask = cv2.threshold(self._diff, self.pixel_threshold, 255, cv2.THRESH_BINARY, dst=self._mask)
+        return self._mask
+
+    def _changed_regions(self, mask):
+        """Changed areas as padded, merged (x, y, w, h) boxes in full-frame coordinates"""
+        dilated = cv2.dilate(mask, None, iterations=2)
+        count, _, stats, _ = cv2.connectedComponentsWithStats(dilated)
+
+        frame_width, frame_height = self._frame_size
+        scale_x = frame_width / mask.shape[1]
+        scale_y = frame_height / mask.shape[0]
+        min_area = self.area_threshold * mask.size
+
+        rois = []
+        for x, y, w, h, area in stats[1:count]:  # Label 0 is the unchanged background
+            if area < min_area:
+                continue
+            box = [int(x * scale_x), int(y * scale_y), int(w * scale_x), int(h * scale_y)]
+            roi = pad_box(box, YOLOConfig.MOTION_ROI_PADDING, frame_width, frame_height)
+            if roi is not None:
+                rois.append(roi)
+        return merge_boxes(rois)
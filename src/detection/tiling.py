@@ -0,0 +1,114 @@
+import cv2
+import numpy as np
+from config import YOLOConfig
+
+def make_tiles(width, height, tile_size=YOLOConfig.TILE_SIZE, overlap=YOLOConfig.TILE_OVERLAP):
+    """Overlapping (x, y, w, h) tiles covering the frame, the last row/column flush with its edge"""
+    def starts(length):
+        if length <= tile_size:
+            return [0]
+        step = max(1, int(tile_size * (1 - overlap)))
+        positions = list(range(0, length - tile_size, step))
+        positions.append(length - tile_size)
+        return positions
+
+    return [
+        [x, y, min(tile_size, width), min(tile_size, height)]
+        for y in starts(height)
+        for x in starts(width)
+    ]
+
+def select_tiles(tiles, boxes, confidences, frame_width, frame_height, cursor,
+                 max_tiles=YOLOConfig.TILED_MAX_TILES):
+    """Pick the tiles worth a full-resolution pass, at most max_tiles of them
+
+    Tiles containing small or uncertain detections from the coarse pass come
+    first, busiest first. Remaining slots scan the other tiles round-robin from
+    cursor, so objects the coarse pass missed entirely are found over a few
+    passes. Returns (tile indices, next cursor).
+    """
+    if not tiles:
+        return [], cursor
+
+    frame_area = frame_width * frame_height
+    demand = np.zeros(len(tiles), dtype=np.int64)
+    tile_array = np.asarray(tiles, dtype=np.float64)
+    for (x, y, w, h), confidence in zip(boxes, confidences):
+        if w * h > YOLOConfig.TILE_SMALL_OBJECT * frame_area and confidence >= YOLOConfig.TILE_REFINE_CONFIDENCE:
+            continue  # The coarse pass already sees this one clearly
+        cx, cy = x + w / 2, y + h / 2
+        inside = ((tile_array[:, 0] <= cx) & (cx < tile_array[:, 0] + tile_array[:, 2]) &
+                  (tile_array[:, 1] <= cy) & (cy < tile_array[:, 1] + tile_array[:, 3]))
+        demand += inside
+
+    chosen = [int(i) for i in np.argsort(-demand, kind='stable') if demand[i] > 0][:max_tiles]
+    for offset in range(len(tiles)):
+        if len(chosen) >= max_tiles:
+            break
+        index = (cursor + offset) % len(tiles)
+        if index not in chosen:
+            chosen.append(index)
+            cursor = index + 1
+    return chosen, cursor % len(tiles)
+
+def merge_detections(detections, tiles=(), frame_width=0, frame_height=0,
+                     nms_threshold=YOLOConfig.NMS_THRESHOLD):
+    """Class-aware NMS over detections gathered from the coarse pass and overlapping tiles
+
+    Classes are kept apart by shifting each class's boxes to its own region of
+    the plane before a single NMSBoxes call. Afterwards, a box cut off by an
+    interior tile edge is dropped if a same-class box covers most of it, which
+    catches the partial duplicates plain IoU misses at tile seams.
+    """
+    if not len(detections):
+        return detections
+
+    box_array = detections.boxes.astype(np.float64)
+    class_array = detections.class_ids.astype(np.int64)
+    offset = (box_array[:, :2] + box_array[:, 2:]).max() - box_array[:, :2].min() + 1
+    shifted = box_array.copy()
+    shifted[:, :2] += (class_array * offset)[:, None]
+
+    indices = cv2.dnn.NMSBoxes(
+        shifted.tolist(),
+        detections.confidences.tolist(),
+        YOLOConfig.CONFIDENCE_THRESHOLD,
+        nms_threshold
+    )
+    keep = np.array(indices, dtype=np.int64).flatten()
+    keep = keep[np.argsort(-detections.confidences[keep], kind='stable')]
+    keep = _drop_seam_fragments(box_array, class_array, keep, tiles, frame_width, frame_height)
+    return detections[keep]
+
+def _drop_seam_fragments(boxes, class_ids, keep, tiles, frame_width, frame_height):
+    """Remove boxes touching an interior tile edge that are mostly inside a kept same-class box"""
+    if not len(tiles) or len(keep) < 2:
+        return keep
+
+    # Tile edges that are not also frame edges, where objects get cut in two
+    edges_x = {x for x, _, w, _ in tiles if x > 0} | {x + w for x, _, w, _ in tiles if x + w < frame_width}
+    edges_y = {y for _, y, _, h in tiles if y > 0} | {y + h for _, y, _, h in tiles if y + h < frame_height}
+    edges_x = np.array(sorted(edges_x), dtype=np.float64)
+    edges_y = np.array(sorted(edges_y), dtype=np.float64)
+    margin = YOLOConfig.TILE_SEAM_MARGIN
+
+    result = []
+    for i in keep:
+        x, y, w, h = boxes[i]
+        at_seam = (np.any(np.abs(edges_x - x) <= margin) or np.any(np.abs(edges_x - (x + w)) <= margin) or
+                   np.any(np.abs(edges_y - y) <= margin) or np.any(np.abs(edges_y - (y + h)) <= margin))
+        if at_seam:
+            covered = False
+            for j in result:
+                if class_ids[j] != class_ids[i]:
+                    continue
+                ox, oy, ow, oh = boxes[j]
+                inter_w = min(x + w, ox + ow) - max(x, ox)
+                inter_h = min(y + h, oy + oh) - max(y, oy)
+                if inter_w > 0 and inter_h > 0 and inter_w * inter_h >= YOLOConfig.TILE_CONTAINMENT * w * h:
+                    covered = True
+                    break
+            if covered:
+                continue
+        result.append(i)
+    return np.array(result, dtype=np.int64)
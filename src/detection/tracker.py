@@ -0,0 +1,188 @@
+import numpy as np
+from config import YOLOConfig
+from detection.detections import Detections
+
+class Track:
+    """A tracked object with a constant-velocity motion model"""
+
+    def __init__(self, track_id, box, class_id, confidence, timestamp):
+        self.track_id = track_id
+        self.box = np.array(box, dtype=np.float64)  # x, y, w, h at last_update
+        self.velocity = np.zeros(2)  # Box centre velocity in pixels per second
+        self.class_id = class_id
+        self.confidence = confidence
+        self.last_update = timestamp
+        self.hits = 1
+        self.missed = 0  # Detection passes since the track was last matched
+
+    def center(self):
+        return self.box[:2] + self.box[2:] / 2
+
+    def predict(self, timestamp, max_prediction):
+        """Box extrapolated to timestamp, holding still beyond max_prediction seconds"""
+        dt = min(max(timestamp - self.last_update, 0.0), max_prediction)
+        box = self.box.copy()
+        box[:2] += self.velocity * dt
+        return box
+
+    def update(self, box, confidence, timestamp, smoothing):
+        """Correct the track with a new detection and re-estimate its velocity"""
+        box = np.asarray(box, dtype=np.float64)
+        dt = timestamp - self.last_update
+        if dt > 0:
+            measured = (box[:2] + box[2:] / 2 - self.center()) / dt
+            self.velocity = smoothing * self.velocity + (1 - smoothing) * measured
+        self.box = box
+        self.confidence = confidence
+        self.last_update = timestamp
+        self.hits += 1
+        self.missed = 0
+
+class Tracker:
+    """Associates detections across passes and predicts boxes in between
+
+    Only tracks matched (or started) by the latest detection pass are reported.
+    Tracks that missed it are kept, unseen, until max_age so a later pass can
+    still pick them up, instead of being drawn frozen where the object was.
+    """
+
+    def __init__(self, iou_threshold=YOLOConfig.TRACK_IOU_THRESHOLD,
+                 centroid_gate=YOLOConfig.TRACK_CENTROID_GATE,
+                 gate_speed=YOLOConfig.TRACK_GATE_SPEED,
+                 max_age=None,
+                 max_prediction=None,
+                 velocity_smoothing=YOLOConfig.TRACK_VELOCITY_SMOOTHING):
+        self.iou_threshold = iou_threshold
+        self.centroid_gate = centroid_gate
+        self.gate_speed = gate_speed
+        self.velocity_smoothing = velocity_smoothing
+
+        # Fixed lifetimes if given, otherwise they follow the detection interval
+        self._fixed_max_age = max_age
+        self._fixed_max_prediction = max_prediction
+        self.set_interval(YOLOConfig.DETECTION_INTERVAL)
+
+        self.tracks = []
+        self.next_track_id = 1
+
+    def set_interval(self, interval):
+        """Scale track lifetime and extrapolation to the current detection interval"""
+        self.max_age = (self._fixed_max_age if self._fixed_max_age is not None
+                        else interval * YOLOConfig.TRACK_MAX_AGE_INTERVALS)
+        self.max_prediction = (self._fixed_max_prediction if self._fixed_max_prediction is not None
+                               else interval * YOLOConfig.TRACK_MAX_PREDICTION_INTERVALS)
+
+    def clear(self):
+        """Drop all tracks"""
+        self.tracks = []
+
+    def update(self, boxes, class_ids, confidences, timestamp):
+        """Match detections to tracks and return the track ID assigned to each detection"""
+        self._expire(timestamp)
+
+        matches = self._associate(boxes, class_ids, timestamp)
+        for track in self.tracks:
+            track.missed += 1  # Reset below for the tracks this pass matches
+        track_ids = []
+        for i, (box, class_id, confidence) in enumerate(zip(boxes, class_ids, confidences)):
+            track = matches.get(i)
+            if track is None:
+                track = Track(self.next_track_id, box, class_id, confidence, timestamp)
+                self.next_track_id += 1
+                self.tracks.append(track)
+            else:
+                track.update(box, confidence, timestamp, self.velocity_smoothing)
+            track_ids.append(track.track_id)
+        return track_ids
+
+    def hold(self, timestamp):
+        """Confirm the tracks matched by the latest pass where they are, e.g. when the scene has not changed
+
+        Their boxes are fixed at the current prediction rather than snapped
+        back to the last measurement. Tracks the latest pass did not match
+        are left to expire.
+        """
+        for track in self.tracks:
+            if track.missed:
+                continue
+            track.box = track.predict(timestamp, self.max_prediction)
+            track.velocity[:] = 0.0
+            track.last_update = timestamp
+
+    def predict(self, timestamp):
+        """Return Detections for the tracks seen in the latest pass, with boxes extrapolated to timestamp"""
+        self._expire(timestamp)
+        current = [track for track in self.tracks if not track.missed]
+        if not current:
+            return Detections.empty()
+
+        return Detections.from_arrays(
+            [track.predict(timestamp, self.max_prediction) for track in current],
+            [track.class_id for track in current],
+            [track.confidence for track in current],
+            [track.track_id for track in current]
+        )
+
+    def _expire(self, timestamp):
+        """Remove tracks that have not been seen for max_age seconds"""
+        self.tracks = [t for t in self.tracks if timestamp - t.last_update <= self.max_age]
+
+    def _associate(self, boxes, class_ids, timestamp):
+        """Greedy class-aware matching on IoU, falling back to centroid distance
+
+        The centroid gate widens with the time since each track was last seen
+        and with its speed, so an object that moved about a box width between
+        passes still keeps its track.
+        """
+        if not self.tracks or len(boxes) == 0:
+            return {}
+
+        predicted = np.array([t.predict(timestamp, self.max_prediction) for t in self.tracks])
+        detected = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        same_class = (np.asarray(class_ids)[:, None] ==
+                      np.array([t.class_id for t in self.tracks])[None, :])
+
+        iou = box_iou(detected, predicted)
+        iou[~same_class] = 0.0
+
+        # Centroid distance normalised by the larger box dimension
+        det_centers = detected[:, :2] + detected[:, 2:] / 2
+        trk_centers = predicted[:, :2] + predicted[:, 2:] / 2
+        scale = np.maximum(np.maximum(detected[:, 2:].max(axis=1)[:, None],
+                                      predicted[:, 2:].max(axis=1)[None, :]), 1.0)
+        centroid = np.linalg.norm(det_centers[:, None, :] - trk_centers[None, :, :], axis=2) / scale
+        centroid[~same_class] = np.inf
+
+        # Gate per track in box sizes: the base gate plus how far it could have moved since last seen
+        elapsed = np.clip([timestamp - t.last_update for t in self.tracks], 0.0, self.max_age)
+        speed = np.array([np.hypot(*t.velocity) / max(t.box[2:].max(), 1.0) for t in self.tracks])
+        gate = self.centroid_gate + (self.gate_speed + speed) * elapsed
+
+        matches = {}
+        used_tracks = set()
+        for score, valid in ((-iou, iou >= self.iou_threshold),
+                             (centroid, centroid <= gate[None, :])):
+            for flat in np.argsort(score, axis=None):
+                det, trk = (int(i) for i in np.unravel_index(flat, score.shape))
+                if not valid[det, trk]:
+                    continue
+                if det in matches or trk in used_tracks:
+                    continue
+                matches[det] = self.tracks[trk]
+                used_tracks.add(trk)
+        return matches
+
+def box_iou(boxes_a, boxes_b):
+    """Pairwise IoU between two arrays of xywh boxes"""
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    ax2 = a[:, 0] + a[:, 2]
+    ay2 = a[:, 1] + a[:, 3]
+    bx2 = b[:, 0] + b[:, 2]
+    by2 = b[:, 1] + b[:, 3]
+
+    inter_w = np.clip(np.minimum(ax2[:, None], bx2[None, :]) - np.maximum(a[:, None, 0], b[None, :, 0]), 0, None)
+    inter_h = np.clip(np.minimum(ay2[:, None], by2[None, :]) - np.maximum(a[:, None, 1], b[None, :, 1]), 0, None)
+    inter = inter_w * inter_h
+    union = (a[:, 2] * a[:, 3])[:, None] + (b[:, 2] * b[:, 3])[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
@@ -0,0 +1,186 @@
+import math
+import time
+import argparse
+import cv2
+import numpy as np
+from detection.model import YOLOModel
+from detection.face_model import FaceModel
+from visualization.draw import draw_bounding_boxes
+from config import YOLOConfig
+from app.app_manager import AppManager
+from utils.metrics import metrics
+from utils.frame_pool import frame_pool
+from app.frame_scheduler import FrameScheduler
+from app.stream_manager import CameraStream, InferenceScheduler
+from visualization.display_scaler import DisplayScaler
+
+def parse_source(value):
+    """Camera indices are given as integers, anything else is a video file path"""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+def draw_stream_info(frame, stream):
+    """Stream name with its display FPS and capture-to-display latency"""
+    text = f"{stream.name}  {stream.fps:.1f} FPS  {stream.latency * 1000:.0f} ms"
+    cv2.putText(frame, text, (12, 32), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 4, cv2.LINE_AA)
+    cv2.putText(frame, text, (12, 32), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2, cv2.LINE_AA)
+
+def draw_stream_failed(frame, stream):
+    """Mark a stream whose source stopped delivering frames"""
+    text = f"{stream.name}  NO SIGNAL"
+    cv2.putText(frame, text, (12, 32), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 4, cv2.LINE_AA)
+    cv2.putText(frame, text, (12, 32), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2, cv2.LINE_AA)
+
+def render_stream(stream, overlay=True):
+    """Draw a stream's latest frame with its detections into a pooled buffer
+
+    The info line is left out when overlay is False, like the status overlay
+    of the single-camera loop under load; a failed stream is always marked.
+    """
+    if stream.last_frame is None:
+        render_frame = frame_pool.acquire((YOLOConfig.MAX_CAMERA_HEIGHT, YOLOConfig.MAX_CAMERA_WIDTH, 3))
+        render_frame.array[:] = 0
+    else:
+        render_frame = frame_pool.copy(stream.last_frame.array)
+        draw_bounding_boxes(render_frame.array, stream.last_results, stream.detection_mgr.classes)
+    if stream.failed:
+        draw_stream_failed(render_frame.array, stream)
+    elif overlay:
+        draw_stream_info(render_frame.array, stream)
+    return render_frame
+
+def build_mosaic(streams, cols, rows, tile_width, tile_height):
+    """Mosaic canvas and each stream's tile view into it"""
+    mosaic = np.zeros((rows * tile_height, cols * tile_width, 3), dtype=np.uint8)
+    tiles = {}
+    for i, stream in enumerate(streams):
+        row, col = divmod(i, cols)
+        tiles[stream] = mosaic[row * tile_height:(row + 1) * tile_height,
+                               col * tile_width:(col + 1) * tile_width]
+    return mosaic, tiles
+
+def main():
+    parser = argparse.ArgumentParser(description="Run detection on several cameras or video files at once")
+    parser.add_argument('sources', nargs='+', type=parse_source, help="Camera indices or video file paths")
+    parser.add_argument('--layout', choices=('mosaic', 'windows'), default='mosaic',
+                        help="One tiled window, or one window per stream")
+    parser.add_argument('--tile-width', type=int, default=640)
+    parser.add_argument('--tile-height', type=int, default=360)
+    args = parser.parse_args()
+
+    app = AppManager()
+    streams = []
+    inference = None
+
+    try:
+        if YOLOConfig.METRICS_ENABLED:
+            metrics.start_server()
+
+        # One copy of each model, shared by every stream
+        yolo_model = YOLOModel()
+        yolo_model.load_model(YOLOConfig.WEIGHTS_PATH, YOLOConfig.CONFIG_PATH)
+
+        face_model = FaceModel()
+        face_model.load_faces("training_data/faces")
+
+        for source in args.sources:
+            streams.append(CameraStream(app, source, yolo_model, face_model))
+        for stream in streams:
+            stream.start()
+
+        inference = InferenceScheduler(streams, yolo_model, app.stop_event)
+        inference.start()
+
+        # Mosaic canvases are allocated once per display scale; tiles are written into them in place
+        cols = math.ceil(math.sqrt(len(streams)))
+        rows = math.ceil(len(streams) / cols)
+        mosaics = {}
+        scalers = {stream: DisplayScaler() for stream in streams}
+        last_scale = None
+        if args.layout == 'mosaic':
+            cv2.namedWindow('Multi-Camera Detection', cv2.WINDOW_NORMAL)
+        else:
+            for stream in streams:
+                cv2.namedWindow(stream.name, cv2.WINDOW_NORMAL)
+
+        scheduler = FrameScheduler()
+        while app.running:
+            scheduler.wait()
+
+            with scheduler.stage('inference'):
+                advanced = [stream for stream in streams if stream.poll()]
+
+            # Apply the degradation level the scheduler reports, as the single-camera loop does
+            display_scale = scheduler.display_scale()
+            if display_scale != last_scale:
+                # Every stream is redrawn so the newly used canvas has no stale tiles
+                advanced = [stream for stream in streams if stream.last_frame is not None or stream.failed]
+                last_scale = display_scale
+            displayed = advanced if advanced and not scheduler.drop_frame() else []
+
+            if displayed:
+                with scheduler.stage('render'):
+                    overlay = scheduler.draw_overlay()
+                    rendered = {stream: render_stream(stream, overlay) for stream in displayed}
+
+                with scheduler.stage('display'):
+                    if args.layout == 'mosaic':
+                        # Under load the mosaic is rendered smaller and the window scales it up
+                        tile_width = max(1, int(args.tile_width * display_scale))
+                        tile_height = max(1, int(args.tile_height * display_scale))
+                        if (tile_width, tile_height) not in mosaics:
+                            mosaics[tile_width, tile_height] = build_mosaic(streams, cols, rows,
+                                                                            tile_width, tile_height)
+                        mosaic, tiles = mosaics[tile_width, tile_height]
+                        # Each stream is scaled straight into its tile of the mosaic
+                        for stream, frame in rendered.items():
+                            scalers[stream].render(frame.array, tile_width, tile_height,
+                                                   out=tiles[stream])
+                        cv2.imshow('Multi-Camera Detection', mosaic)
+                    else:
+                        for stream, frame in rendered.items():
+                            image = frame.array
+                            if display_scale != 1.0:
+                                height, width = image.shape[:2]
+                                image = scalers[stream].render(image, max(1, int(width * display_scale)),
+                                                               max(1, int(height * display_scale)))
+                            cv2.imshow(stream.name, image)
+                    for frame in rendered.values():
+                        frame.release()
+
+            with scheduler.stage('display'):
+                key = cv2.waitKey(1) & 0xFF
+            scheduler.end_frame()
+
+            # Counters use wall-clock time to match capture timestamps
+            if displayed:
+                now = time.time()
+                for stream in displayed:
+                    if not stream.failed:
+                        stream.mark_displayed(now)
+
+            if key == ord('q'):
+                print('Quit command received')
+                break
+            elif key == ord('f'):
+                app.toggle_face_detection()
+            elif key == ord('o'):
+                app.toggle_object_detection()
+
+    except KeyboardInterrupt:
+        print('\nInterrupt received')
+    except Exception as e:
+        print(f"Multi-camera error: {str(e)}")
+    finally:
+        app.stop_event.set()
+        if inference:
+            inference.join()
+        for stream in streams:
+            stream.close()
+        app.cleanup()
+        print('Application terminated')
+
+if __name__ == "__main__":
+    main()
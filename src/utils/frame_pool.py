@@ -0,0 +1,95 @@
+import threading
+import numpy as np
+from config import YOLOConfig
+from utils.metrics import metrics
+
+class PooledFrame:
+    """A pool buffer shared between pipeline stages, returned to the pool when the last holder releases it"""
+    __slots__ = ('pool', 'array', 'refs')
+
+    def __init__(self, pool, array):
+        self.pool = pool
+        self.array = array
+        self.refs = 1
+
+    def retain(self):
+        """Take another reference, e.g. before handing the frame to a second stage"""
+        with self.pool.lock:
+            self.refs += 1
+        return self
+
+    def release(self):
+        """Drop a reference; the buffer goes back to the pool when none are left"""
+        self.pool._release(self)
+
+class FramePool:
+    """Preallocated frame buffers reused across frames instead of copying into fresh arrays
+
+    Buffers are grouped by shape and dtype. acquire() only allocates when every
+    buffer of that shape is still held somewhere, and `allocations` counts each
+    time that happens, so in steady state it should stop growing.
+    """
+
+    def __init__(self, capacity=YOLOConfig.FRAME_POOL_SIZE):
+        self.capacity = capacity  # Free buffers kept per shape
+        self.lock = threading.Lock()
+        self._free = {}  # (shape, dtype) -> [arrays]
+
+        self.allocations = 0
+        self.acquired = 0
+        self.in_use = 0
+
+    def acquire(self, shape, dtype=np.uint8):
+        """Get an uninitialised buffer of this shape with one reference"""
+        key = (tuple(shape), np.dtype(dtype))
+        with self.lock:
+            free = self._free.get(key)
+            array = free.pop() if free else None
+            self.acquired += 1
+            self.in_use += 1
+            if array is None:
+                self.allocations += 1
+        if array is None:
+            array = np.empty(shape, dtype=dtype)
+            metrics.inc('frame_allocations')
+        return PooledFrame(self, array)
+
+    def adopt(self, array):
+        """Take ownership of an array allocated elsewhere (e.g. by cv2) as a pooled frame"""
+        with self.lock:
+            self.acquired += 1
+            self.in_use += 1
+            self.allocations += 1
+        metrics.inc('frame_allocations')
+        return PooledFrame(self, array)
+
+    def copy(self, frame):
+        """Copy an array (e.g. a recycled capture buffer) into a pooled buffer"""
+        pooled = self.acquire(frame.shape, frame.dtype)
+        np.copyto(pooled.array, frame)
+        return pooled
+
+    def _release(self, pooled):
+        with self.lock:
+            pooled.refs -= 1
+            if pooled.refs > 0:
+                return
+            if pooled.refs < 0:
+                raise RuntimeError("Frame released more times than it was retained")
+            self.in_use -= 1
+            key = (pooled.array.shape, pooled.array.dtype)
+            free = self._free.setdefault(key, [])
+            if len(free) < self.capacity:
+                free.append(pooled.array)
+
+def release_item(item):
+    """Release every pooled frame in a queue item (a tuple, or a single frame)"""
+    if isinstance(item, PooledFrame):
+        item.release()
+    elif isinstance(item, tuple):
+        for value in item:
+            if isinstance(value, PooledFrame):
+                value.release()
+
+# Shared pool so every stage draws from the same buffers
+frame_pool = FramePool()
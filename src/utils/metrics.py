@@ -0,0 +1,148 @@
+import time
+import threading
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+from config import YOLOConfig
+
+# Shared by every disabled span, so turning metrics off costs one attribute check per span
+_NO_SPAN = nullcontext()
+
+class RollingHistogram:
+    """Keeps the most recent durations in a fixed ring; percentiles are computed on scrape"""
+
+    def __init__(self, window=YOLOConfig.METRICS_WINDOW):
+        self._samples = np.zeros(window, dtype=np.float64)
+        self._index = 0
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        with self._lock:
+            self._samples[self._index] = seconds
+            self._index = (self._index + 1) % len(self._samples)
+            self.count += 1
+            self.total += seconds
+
+    def percentiles(self, quantiles):
+        """Percentiles (0-100) over the current window, or None before anything was observed"""
+        with self._lock:
+            samples = self._samples[:min(self.count, len(self._samples))].copy()
+        if not len(samples):
+            return None
+        return np.percentile(samples, quantiles)
+
+class Span:
+    """Times a with-block into a histogram"""
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+class Metrics:
+    """Stage timings and event counters, exported in Prometheus text format"""
+
+    QUANTILES = (50, 95, 99)
+
+    def __init__(self, enabled=YOLOConfig.METRICS_ENABLED):
+        self.enabled = enabled
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def span(self, stage):
+        """Context manager timing one hot-path stage; a shared no-op when disabled"""
+        if not self.enabled:
+            return _NO_SPAN
+        return Span(self.histogram(stage))
+
+    def observe(self, stage, seconds):
+        """Record a duration that was already measured elsewhere"""
+        if self.enabled:
+            self.histogram(stage).observe(seconds)
+
+    def inc(self, name, amount=1, **labels):
+        """Increment a counter, e.g. inc('queue_full', queue='face_queue')"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def histogram(self, stage):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, RollingHistogram())
+        return histogram
+
+    def render(self):
+        """All metrics in Prometheus text exposition format"""
+        lines = [
+            '# HELP cv_demo_stage_seconds Duration of hot-path stages over a rolling window',
+            '# TYPE cv_demo_stage_seconds summary'
+        ]
+        for stage, histogram in sorted(self.histograms.items()):
+            values = histogram.percentiles(self.QUANTILES)
+            if values is not None:
+                for quantile, value in zip(self.QUANTILES, values):
+                    lines.append(f'cv_demo_stage_seconds{{stage="{stage}",quantile="{quantile / 100}"}} {value:.6f}')
+            lines.append(f'cv_demo_stage_seconds_sum{{stage="{stage}"}} {histogram.total:.6f}')
+            lines.append(f'cv_demo_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+        with self._lock:
+            counters = sorted(self.counters.items())
+        declared = set()
+        for (name, labels), value in counters:
+            metric = f'cv_demo_{name}_total'
+            if metric not in declared:
+                lines.append(f'# TYPE {metric} counter')
+                declared.add(metric)
+            label_text = ','.join(f'{key}="{val}"' for key, val in labels)
+            lines.append(f'{metric}{{{label_text}}} {value}' if label_text else f'{metric} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def start_server(self, host=YOLOConfig.METRICS_HOST, port=YOLOConfig.METRICS_PORT):
+        """Enable collection and serve /metrics from a background thread"""
+        self.enabled = True
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes would otherwise print a line every few seconds
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        print(f"Metrics available at http://{host}:{port}/metrics")
+
+    def stop_server(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+# Create a singleton instance
+metrics = Metrics()
@@ -1,16 +1,14 @@
+from detection.detections import Detections
+
 class ResultProcessor:
     def combine_results(self, yolo_results, face_results, yolo_classes, classes=None):
-        """Combine YOLO and face detection results"""
-        boxes = list(yolo_results[0])
-        class_ids = list(yolo_results[1]) 
-        confidences = list(yolo_results[2])
+        """Combine YOLO and face Detections into one
         
-        # Adjust face class IDs and add face detections
-        face_boxes, face_class_ids, face_confidences = face_results
-        for i, face_id in enumerate(face_class_ids):
-            if face_id >= 0:  # Valid detection
-                boxes.append(face_boxes[i])
-                class_ids.append(len(yolo_classes) + face_id)  # Offset by YOLO classes
-                confidences.append(face_confidences[i])
-                
-        return boxes, class_ids, confidences
\ No newline at end of file
+        Face class IDs are offset past the YOLO classes, and unrecognised faces
+        (class ID -1) are dropped. Returns Detections.
+        """
+        if not len(face_results):
+            return yolo_results
+        
+        recognised = face_results[face_results.class_ids >= 0]
+        return Detections.concat([yolo_results, recognised.with_class_offset(len(yolo_classes))])
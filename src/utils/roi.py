@@ -0,0 +1,35 @@
+def pad_box(box, padding, frame_width, frame_height):
+    """Grow an (x, y, w, h) box by a fraction of its size on each side, clipped to the frame"""
+    x, y, w, h = box
+    pad_x = int(w * padding)
+    pad_y = int(h * padding)
+    x0 = max(0, int(x) - pad_x)
+    y0 = max(0, int(y) - pad_y)
+    x1 = min(frame_width, int(x + w) + pad_x)
+    y1 = min(frame_height, int(y + h) + pad_y)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return [x0, y0, x1 - x0, y1 - y0]
+
+def merge_boxes(boxes):
+    """Merge overlapping (x, y, w, h) boxes into their unions until none overlap"""
+    merged = [list(box) for box in boxes]
+    changed = True
+    while changed:
+        changed = False
+        result = []
+        for box in merged:
+            for other in result:
+                if (box[0] < other[0] + other[2] and other[0] < box[0] + box[2] and
+                        box[1] < other[1] + other[3] and other[1] < box[1] + box[3]):
+                    x0 = min(box[0], other[0])
+                    y0 = min(box[1], other[1])
+                    x1 = max(box[0] + box[2], other[0] + other[2])
+                    y1 = max(box[1] + box[3], other[1] + other[3])
+                    other[:] = [x0, y0, x1 - x0, y1 - y0]
+                    changed = True
+                    break
+            else:
+                result.append(box)
+        merged = result
+    return merged
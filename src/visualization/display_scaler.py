@@ -0,0 +1,87 @@
+import cv2
+import numpy as np
+
+class DisplayScaler:
+    """Letterboxes (or crop-fills) frames into a persistent display canvas
+
+    Scale, offsets and the source crop are computed once per (source size,
+    target size, fill mode) and the black bars are painted only when that
+    geometry changes. Each frame is then resized straight into its view of the
+    canvas, so no per-frame canvas or intermediate resized frame is allocated.
+    The returned canvas is overwritten by the next call.
+    """
+
+    def __init__(self):
+        self._key = None
+        self._canvas = None
+        self._source_rect = None  # (x0, y0, x1, y1) of the source that is shown
+        self._view = None  # Region of the canvas the source is resized into
+        self._interpolation = cv2.INTER_AREA
+        self.rebuilds = 0
+
+    def render(self, frame, target_width, target_height, fill_screen=False, out=None):
+        """Scale frame into a target_width x target_height canvas, preserving aspect ratio
+
+        Args:
+            frame: Input frame
+            target_width: Target width
+            target_height: Target height
+            fill_screen: If True, fills the entire canvas by cropping if necessary
+            out: Optional persistent destination (e.g. a mosaic tile) to use as the canvas
+        """
+        if frame is None:
+            canvas = self._canvas_for(target_width, target_height, out)
+            canvas[:] = 0
+            self._key = None  # Bars must be repainted once frames arrive again
+            return canvas
+
+        h, w = frame.shape[:2]
+        key = (w, h, target_width, target_height, fill_screen, id(out) if out is not None else None)
+        if key != self._key:
+            self._rebuild(w, h, target_width, target_height, fill_screen, out)
+            self._key = key
+
+        x0, y0, x1, y1 = self._source_rect
+        source = frame[y0:y1, x0:x1]
+        if source.shape[:2] == self._view.shape[:2]:
+            np.copyto(self._view, source)
+        else:
+            cv2.resize(source, (self._view.shape[1], self._view.shape[0]),
+                       dst=self._view, interpolation=self._interpolation)
+        return self._canvas
+
+    def _canvas_for(self, target_width, target_height, out):
+        if out is not None:
+            self._canvas = out
+        elif self._canvas is None or self._canvas.shape[:2] != (target_height, target_width):
+            self._canvas = np.zeros((target_height, target_width, 3), dtype=np.uint8)
+        return self._canvas
+
+    def _rebuild(self, w, h, target_width, target_height, fill_screen, out):
+        """Recompute geometry for a new source/target size or mode and repaint the bars"""
+        canvas = self._canvas_for(target_width, target_height, out)
+        self.rebuilds += 1
+
+        if fill_screen:
+            # Cover the whole canvas: only the centred part of the source that
+            # survives the crop is resized, straight to the canvas size
+            scale = max(target_width / w, target_height / h)
+            crop_w = min(w, max(1, int(round(target_width / scale))))
+            crop_h = min(h, max(1, int(round(target_height / scale))))
+            x0 = (w - crop_w) // 2
+            y0 = (h - crop_h) // 2
+            self._source_rect = (x0, y0, x0 + crop_w, y0 + crop_h)
+            self._view = canvas
+        else:
+            # Letterbox/pillarbox: black bars around the scaled frame
+            scale = min(target_width / w, target_height / h)
+            new_w = max(1, int(w * scale))
+            new_h = max(1, int(h * scale))
+            x_offset = (target_width - new_w) // 2
+            y_offset = (target_height - new_h) // 2
+            canvas[:] = 0
+            self._source_rect = (0, 0, w, h)
+            self._view = canvas[y_offset:y_offset + new_h, x_offset:x_offset + new_w]
+
+        # INTER_AREA is best for downsampling, linear is much cheaper for upscaling to large windows
+        self._interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_LINEAR
@@ -1,14 +1,21 @@
 import cv2
 import numpy as np
-from PIL import Image, ImageDraw, ImageFont
+from config import YOLOConfig
+from visualization.sprite_cache import label_renderer
 
-def draw_rounded_box(image, x, y, w, h, radius, color, thickness):
-    """
-    Draws a rounded rectangle on the image with improved anti-aliasing.
-    """
-    # Create a separate image for the rounded rectangle to enable better anti-aliasing
-    mask = np.zeros((image.shape[0], image.shape[1], 3), dtype=np.uint8)
-    
+def _shape_rect(image, x, y, w, h, thickness):
+    """Clipped (x0, y0, x1, y1) rectangle covering a rounded box and its anti-aliased edge"""
+    margin = max(thickness, 1) // 2 + 2
+    x0 = max(0, x - margin)
+    y0 = max(0, y - margin)
+    x1 = min(image.shape[1], x + w + margin + 1)
+    y1 = min(image.shape[0], y + h + margin + 1)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return x0, y0, x1, y1
+
+def _draw_rounded_shape(mask, x, y, w, h, radius, color, thickness):
+    """Draw a rounded rectangle outline (thickness > 0) or fill (thickness < 0) into mask"""
     if thickness < 0:
         # For filled rectangles
         # First draw the filled rectangle without corners
@@ -37,32 +44,105 @@ def draw_rounded_box(image, x, y, w, h, radius, color, thickness):
         cv2.ellipse(mask, (x + w - radius, y + radius), (radius, radius), 270, 0, 90, color, thickness, cv2.LINE_AA)
         cv2.ellipse(mask, (x + radius, y + h - radius), (radius, radius), 90, 0, 90, color, thickness, cv2.LINE_AA)
         cv2.ellipse(mask, (x + w - radius, y + h - radius), (radius, radius), 0, 0, 90, color, thickness, cv2.LINE_AA)
+
+def draw_rounded_box(image, x, y, w, h, radius, color, thickness, scratch=None):
+    """
+    Draws a rounded rectangle on the image with improved anti-aliasing.
+    Only the box's own bounding rectangle is touched. If scratch (an all-zero
+    buffer the size of image) is given it is used for the mask and left zeroed.
+    """
+    rect = _shape_rect(image, x, y, w, h, thickness)
+    if rect is None:
+        return
+    x0, y0, x1, y1 = rect
+    
+    # Draw the shape into a mask covering just its bounding rectangle
+    if scratch is None:
+        mask = np.zeros((y1 - y0, x1 - x0, 3), dtype=np.uint8)
+    else:
+        mask = scratch[y0:y1, x0:x1]
+    _draw_rounded_shape(mask, x - x0, y - y0, w, h, radius, color, thickness)
     
     # Blend the mask with the original image
-    cv2.addWeighted(mask, 1, image, 1, 0, image)
+    roi = image[y0:y1, x0:x1]
+    cv2.add(roi, mask, dst=roi)
+    
+    if scratch is not None:
+        mask[:] = 0
+
+class OverlayCompositor:
+    """Draws box fills and borders within their own rectangles using reusable buffers"""
+    
+    def __init__(self):
+        # Both buffers are kept all-zero between uses
+        self._scratch = None
+        self._fill = None
+        self._fill_rect = None
+    
+    def begin(self, image):
+        """Prepare buffers for a frame of this size"""
+        if self._scratch is None or self._scratch.shape != image.shape:
+            self._scratch = np.zeros(image.shape, dtype=np.uint8)
+            self._fill = np.zeros(image.shape, dtype=np.uint8)
+        self._fill_rect = None
+    
+    def add_fill(self, image, x, y, w, h, radius, color):
+        """Accumulate a filled rounded box to be blended in finish()"""
+        rect = _shape_rect(image, x, y, w, h, -1)
+        if rect is None:
+            return
+        draw_rounded_box(self._fill, x, y, w, h, radius, color, -1, scratch=self._scratch)
+        
+        # Grow the region that finish() has to blend
+        if self._fill_rect is None:
+            self._fill_rect = rect
+        else:
+            fx0, fy0, fx1, fy1 = self._fill_rect
+            x0, y0, x1, y1 = rect
+            self._fill_rect = (min(fx0, x0), min(fy0, y0), max(fx1, x1), max(fy1, y1))
+    
+    def draw_border(self, image, x, y, w, h, radius, color, thickness):
+        """Draw a rounded box outline straight onto the image"""
+        draw_rounded_box(image, x, y, w, h, radius, color, thickness, scratch=self._scratch)
+    
+    def finish(self, image, alpha):
+        """Blend all accumulated fills onto the image in one pass"""
+        if self._fill_rect is None:
+            return
+        x0, y0, x1, y1 = self._fill_rect
+        roi = image[y0:y1, x0:x1]
+        fill = self._fill[y0:y1, x0:x1]
+        cv2.addWeighted(fill, alpha, roi, 1, 0, dst=roi)
+        fill[:] = 0
+        self._fill_rect = None
 
-def draw_bounding_boxes(image, boxes, class_ids, confidences, classes):
+# Shared compositor so buffers are reused across frames
+compositor = OverlayCompositor()
+
+def draw_bounding_boxes(image, detections, classes):
     """
-    Draws bounding boxes and labels on the input image.
+    Draws the bounding boxes and labels of a Detections on the input image.
+    Track IDs >= 0 are shown after the class name.
     """
-    overlay = image.copy()
-    background = np.zeros_like(image, dtype=np.uint8)
+    compositor.begin(image)
     
-    for i in range(len(boxes)):
-        box = boxes[i]
-        x, y, w, h = box
-        label = f"{classes[class_ids[i]]}: {confidences[i]:.2f}"
+    for (x, y, w, h), class_id, confidence, track_id in detections.rows():
+        name = classes[class_id]
+        if track_id >= 0:
+            name = f"{name} #{track_id}"
+        # Quantise confidence so small changes reuse the same cached label sprite
+        step = YOLOConfig.LABEL_CONFIDENCE_STEP
+        label = f"{name}: {round(confidence / step) * step:.2f}"
         
-        # Draw rounded rectangle in the background image
-        draw_rounded_box(background, 
-                        x + 4, y + 4,  # margin offset
-                        w - 8, h - 8,  # size reduction for margin
-                        radius=15, 
-                        color=(144, 238, 144), 
-                        thickness=-1)  # -1 for filled rectangle
+        # Accumulate the rounded fill, blended once after all boxes are drawn
+        compositor.add_fill(image,
+                            x + 4, y + 4,  # margin offset
+                            w - 8, h - 8,  # size reduction for margin
+                            radius=15, 
+                            color=(144, 238, 144))
         
         # Draw rounded rectangle border with increased thickness for smoother appearance
-        draw_rounded_box(image, x, y, w, h, radius=15, color=(0, 200, 0), thickness=3)
+        compositor.draw_border(image, x, y, w, h, radius=15, color=(0, 200, 0), thickness=3)
         
         # Draw text using PIL with reduced offset
         image = draw_text_with_pil(
@@ -75,63 +155,20 @@ def draw_bounding_boxes(image, boxes, class_ids, confidences, classes):
             corner_radius=8
         )
     
-    # Blend the overlay with the original image
+    # Blend the accumulated fills with the image
     alpha = 0.1
-    cv2.addWeighted(background, alpha, image, 1, 0, image)
+    compositor.finish(image, alpha)
     
     return image
 
 def draw_text_with_pil(cv2_im, text, position, font_size=32, 
                       text_color=(255, 255, 255), bg_color=(0, 200, 0), 
                       corner_radius=8):
-    """Convert CV2 image to PIL, draw text, and convert back."""
-    cv2_im_rgb = cv2.cvtColor(cv2_im, cv2.COLOR_BGR2RGB)
-    pil_im = Image.fromarray(cv2_im_rgb)
-    
-    # Create a drawing context
-    draw = ImageDraw.Draw(pil_im)
-    
-    try:
-        font = ImageFont.truetype("/System/Library/Fonts/SFCompact.ttf", font_size)
-    except:
-        font = ImageFont.load_default()
-    
-    # Get text size
-    text_bbox = draw.textbbox((0, 0), text, font=font)
-    text_width = text_bbox[2] - text_bbox[0]
-    text_height = text_bbox[3] - text_bbox[1]
-    
-    # Add non-uniform padding - less on top
-    padding_top = 5      # Reduced top padding
-    padding_bottom = 10
-    padding_left = 10
-    padding_right = 10
-    
-    x, y = position
-    
-    # Create a new image for the rounded rectangle background
-    background = Image.new('RGBA', pil_im.size, (0, 0, 0, 0))
-    bg_draw = ImageDraw.Draw(background)
-    
-    # Draw rounded rectangle with reduced top padding
-    bg_draw.rounded_rectangle(
-        [
-            x - padding_left,
-            y - padding_top,
-            x + text_width + padding_right,
-            y + text_height + padding_bottom
-        ],
-        radius=corner_radius,
-        fill=bg_color
+    """Blend a cached PIL-rendered label into the image, touching only the label's rectangle."""
+    return label_renderer.draw(
+        cv2_im, text, position,
+        font_size=font_size,
+        text_color=text_color,
+        bg_color=bg_color,
+        corner_radius=corner_radius
     )
-    
-    # Composite the background onto the main image
-    pil_im = Image.alpha_composite(pil_im.convert('RGBA'), background)
-    
-    # Draw text
-    draw = ImageDraw.Draw(pil_im)
-    draw.text(position, text, font=font, fill=text_color)
-    
-    # Convert back to CV2 format
-    result = cv2.cvtColor(np.array(pil_im.convert('RGB')), cv2.COLOR_RGB2BGR)
-    return result
\ No newline at end of file
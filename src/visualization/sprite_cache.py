@@ -0,0 +1,137 @@
+from collections import OrderedDict
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from config import YOLOConfig
+
+class Sprite:
+    """Pre-rendered overlay stored premultiplied, ready to blend into a frame"""
+
+    def __init__(self, premultiplied, inverse_alpha, offset_x=0, offset_y=0):
+        self.premultiplied = premultiplied  # BGR float32, already scaled by alpha
+        self.inverse_alpha = inverse_alpha  # float32 (h, w, 1), 1 - alpha
+        self.height, self.width = premultiplied.shape[:2]
+        self.scratch = np.empty_like(premultiplied)  # Reused by blend_sprite (drawing is single-threaded)
+
+        # Where the sprite's top-left sits relative to the position it is drawn at
+        self.offset_x = offset_x
+        self.offset_y = offset_y
+
+    @classmethod
+    def from_layers(cls, layers, offset_x=0, offset_y=0):
+        """Build a sprite from (rgb_color, coverage) layers painted bottom to top
+        
+        Coverage masks are 8-bit PIL 'L' images, so the result matches drawing
+        each layer straight onto the frame with PIL.
+        """
+        size = layers[0][1].size
+        premultiplied = np.zeros((size[1], size[0], 3), dtype=np.float32)
+        inverse_alpha = np.ones((size[1], size[0], 1), dtype=np.float32)
+        for color, mask in layers:
+            coverage = np.asarray(mask, dtype=np.float32)[:, :, None] / 255.0
+            bgr = np.array(color[::-1], dtype=np.float32)
+            premultiplied = premultiplied * (1.0 - coverage) + bgr * coverage
+            inverse_alpha *= 1.0 - coverage
+        return cls(premultiplied, inverse_alpha, offset_x, offset_y)
+
+def blend_sprite(frame, sprite, x, y):
+    """Alpha-blend a sprite into the frame in place, touching only its own rectangle
+    
+    The arithmetic runs in the sprite's own scratch buffer, so blending allocates nothing.
+    """
+    x += sprite.offset_x
+    y += sprite.offset_y
+    x0 = max(x, 0)
+    y0 = max(y, 0)
+    x1 = min(x + sprite.width, frame.shape[1])
+    y1 = min(y + sprite.height, frame.shape[0])
+    if x1 <= x0 or y1 <= y0:
+        return
+
+    sx, sy = x0 - x, y0 - y
+    sprite_rows = slice(sy, sy + (y1 - y0))
+    sprite_cols = slice(sx, sx + (x1 - x0))
+    roi = frame[y0:y1, x0:x1]
+    blended = sprite.scratch[sprite_rows, sprite_cols]
+    np.multiply(roi, sprite.inverse_alpha[sprite_rows, sprite_cols], out=blended)
+    np.add(blended, sprite.premultiplied[sprite_rows, sprite_cols], out=blended)
+    np.add(blended, 0.5, out=blended)
+    np.copyto(roi, blended, casting='unsafe')  # Truncates like astype, so +0.5 rounds
+
+class LabelRenderer:
+    """Rasterises each distinct label once into a sprite kept in a bounded LRU cache"""
+
+    def __init__(self, max_sprites=YOLOConfig.LABEL_CACHE_SIZE):
+        self.max_sprites = max_sprites
+        self._sprites = OrderedDict()
+        self._fonts = {}
+        self._measure = ImageDraw.Draw(Image.new('RGBA', (1, 1)))
+        self.hits = 0
+        self.misses = 0
+
+    def get_font(self, size):
+        """Load or retrieve a cached font with the specified size"""
+        if size not in self._fonts:
+            try:
+                self._fonts[size] = ImageFont.truetype("/System/Library/Fonts/SFCompact.ttf", size)
+            except IOError:
+                self._fonts[size] = ImageFont.load_default()
+        return self._fonts[size]
+
+    def get_sprite(self, text, font_size, text_color, bg_color, corner_radius):
+        """Return the cached sprite for a label, rendering it on first use"""
+        key = (text, font_size, text_color, bg_color, corner_radius)
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+            self.hits += 1
+            return sprite
+
+        self.misses += 1
+        sprite = self._render(text, font_size, text_color, bg_color, corner_radius)
+        self._sprites[key] = sprite
+        if len(self._sprites) > self.max_sprites:
+            self._sprites.popitem(last=False)
+        return sprite
+
+    def _render(self, text, font_size, text_color, bg_color, corner_radius):
+        """Draw the rounded background and text as coverage layers of a small sprite"""
+        font = self.get_font(font_size)
+
+        # Get text size
+        left, top, right, bottom = self._measure.textbbox((0, 0), text, font=font)
+        text_width = right - left
+        text_height = bottom - top
+
+        # Add non-uniform padding - less on top
+        padding_top = 5
+        padding_bottom = 10
+        padding_left = 10
+        padding_right = 10
+
+        bg_right = padding_left + text_width + padding_right
+        bg_bottom = padding_top + text_height + padding_bottom
+        width = max(bg_right, padding_left + right) + 1
+        height = max(bg_bottom, padding_top + bottom) + 1
+
+        bg_mask = Image.new('L', (width, height), 0)
+        ImageDraw.Draw(bg_mask).rounded_rectangle(
+            [0, 0, bg_right, bg_bottom], radius=corner_radius, fill=255
+        )
+        text_mask = Image.new('L', (width, height), 0)
+        ImageDraw.Draw(text_mask).text((padding_left, padding_top), text, font=font, fill=255)
+
+        return Sprite.from_layers(
+            [(bg_color, bg_mask), (text_color, text_mask)],
+            offset_x=-padding_left,
+            offset_y=-padding_top
+        )
+
+    def draw(self, frame, text, position, font_size=32,
+             text_color=(255, 255, 255), bg_color=(0, 200, 0), corner_radius=8):
+        """Blend a label into the frame with its text starting at position"""
+        sprite = self.get_sprite(text, font_size, text_color, bg_color, corner_radius)
+        blend_sprite(frame, sprite, int(position[0]), int(position[1]))
+        return frame
+
+# Shared renderer so sprites are reused across frames
+label_renderer = LabelRenderer()
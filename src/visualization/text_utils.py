@@ -1,6 +1,5 @@
-import cv2
-import numpy as np
 from PIL import Image, ImageDraw, ImageFont
+from visualization.sprite_cache import Sprite, blend_sprite
 
 class TextRenderer:
     """Class for rendering text with PIL for smooth fonts and positioning"""
@@ -19,6 +18,13 @@ class TextRenderer:
         
         # Cache for loaded fonts
         self._fonts = {}
+        self._measure = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+        
+        # Pre-rendered status overlay, rebuilt only when its key changes
+        self.controls_font_size = 20
+        self.status_font_size = 22
+        self._status_key = None
+        self._status_layer = None
     
     def get_font(self, size=20):
         """Load or retrieve a cached font with the specified size"""
@@ -54,17 +60,28 @@ class TextRenderer:
 
     def render_status_text(self, frame, app):
         """Render status overlay with controls and mode indicators"""
-        # Convert OpenCV BGR to RGB for PIL
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        pil_image = Image.fromarray(rgb_frame)
-        draw = ImageDraw.Draw(pil_image)
-        
+        height, width = frame.shape[:2]
+        
+        # The overlay only changes with frame size and toggle state, so it is
+        # rendered once per combination and then just blended into its corner
+        key = (width, height, app.face_detection_enabled, app.object_detection_enabled,
+               self.controls_font_size, self.status_font_size)
+        if key != self._status_key:
+            self._status_layer = self._build_status_layer(
+                width, height, app.face_detection_enabled, app.object_detection_enabled
+            )
+            self._status_key = key
+        
+        layer, x, y = self._status_layer
+        blend_sprite(frame, layer, x, y)
+        return frame
+    
+    def _build_status_layer(self, width, height, face_enabled, object_enabled):
+        """Lay out the status overlay and render it into a sprite covering its corner"""
         # Load fonts
-        controls_font = self.get_font(size=20)
-        status_font = self.get_font(size=22)
-        
-        # Get image dimensions for positioning
-        width, height = pil_image.size
+        controls_font = self.get_font(size=self.controls_font_size)
+        status_font = self.get_font(size=self.status_font_size)
+        draw = self._measure
         
         # Bottom right positioning
         controls = "Controls: [Q]uit [C]amera [F]ace [O]bject"
@@ -76,8 +93,8 @@ class TextRenderer:
         controls_y = height - controls_height - 10
         
         # Status texts at bottom right, stacked upwards
-        face_status = "Face Detection: ON" if app.face_detection_enabled else "Face Detection: OFF"
-        obj_status = "Object Detection: ON" if app.object_detection_enabled else "Object Detection: OFF"
+        face_status = "Face Detection: ON" if face_enabled else "Face Detection: OFF"
+        obj_status = "Object Detection: ON" if object_enabled else "Object Detection: OFF"
         
         status_color_on = (0, 255, 0)  # Green for enabled
         status_color_off = (255, 0, 0)  # Red for disabled
@@ -93,27 +110,34 @@ class TextRenderer:
         face_x = width - face_width - 10
         face_y = obj_y - face_height - 10
         
-        # Draw text elements with shadows
-        self.draw_text_with_shadow(
-            draw, controls, (controls_x, controls_y), 
-            controls_font
-        )
-        
-        self.draw_text_with_shadow(
-            draw, obj_status, (obj_x, obj_y), 
-            status_font,
-            text_color=status_color_on if app.object_detection_enabled else status_color_off
-        )
-        
-        self.draw_text_with_shadow(
-            draw, face_status, (face_x, face_y), 
-            status_font,
-            text_color=status_color_on if app.face_detection_enabled else status_color_off
-        )
-        
-        # Convert back to OpenCV format
-        result_frame = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-        return result_frame
+        texts = [
+            (controls, (controls_x, controls_y), controls_font, (255, 255, 255)),
+            (obj_status, (obj_x, obj_y), status_font,
+             status_color_on if object_enabled else status_color_off),
+            (face_status, (face_x, face_y), status_font,
+             status_color_on if face_enabled else status_color_off),
+        ]
+        
+        # The layer spans from the top-left of the text block to the frame corner
+        origin_x = max(0, min(controls_x, obj_x, face_x))
+        origin_y = max(0, face_y)
+        size = (max(1, width - origin_x), max(1, height - origin_y))
+        
+        # Draw text elements with shadows as coverage layers
+        shadow_offset = 2
+        layers = []
+        for text, (x, y), font, color in texts:
+            local_x, local_y = x - origin_x, y - origin_y
+            shadow_mask = Image.new('L', size, 0)
+            text_mask = Image.new('L', size, 0)
+            ImageDraw.Draw(shadow_mask).text(
+                (local_x + shadow_offset, local_y + shadow_offset), text, font=font, fill=255
+            )
+            ImageDraw.Draw(text_mask).text((local_x, local_y), text, font=font, fill=255)
+            layers.append(((0, 0, 0), shadow_mask))
+            layers.append((color, text_mask))
+        
+        return Sprite.from_layers(layers), origin_x, origin_y
 
 # Create a singleton instance
 text_renderer = TextRenderer()